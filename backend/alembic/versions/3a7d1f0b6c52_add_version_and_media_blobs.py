@@ -0,0 +1,70 @@
+"""add version and media blobs
+
+Adds presentations.version, the counter every write bumps and PATCH
+requests are checked against, and the media_blobs table with media.blob_id
+for content-addressed storage. Existing media keep a null blob_id and own
+their files. Databases created by a newer create_all already have some of
+these, so only what is missing is added.
+
+Revision ID: 3a7d1f0b6c52
+Revises: 
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7d1f0b6c52'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> set:
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if 'version' not in _columns('presentations'):
+        op.add_column(
+            'presentations',
+            sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+        )
+
+    if not sa.inspect(op.get_bind()).has_table('media_blobs'):
+        op.create_table(
+            'media_blobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('sha256', sa.String(64), nullable=False),
+            sa.Column('filename', sa.String(255), nullable=False),
+            sa.Column('file_path', sa.String(500), nullable=False),
+            sa.Column('file_size', sa.BigInteger(), nullable=False),
+            sa.Column('mime_type', sa.String(100), nullable=False),
+            sa.Column('width', sa.Integer()),
+            sa.Column('height', sa.Integer()),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index('ix_media_blobs_id', 'media_blobs', ['id'])
+        op.create_index('ix_media_blobs_sha256', 'media_blobs', ['sha256'], unique=True)
+
+    if 'blob_id' not in _columns('media'):
+        with op.batch_alter_table('media') as batch_op:
+            batch_op.add_column(sa.Column('blob_id', sa.Integer()))
+            batch_op.create_foreign_key('fk_media_blob_id_media_blobs', 'media_blobs', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('media') as batch_op:
+        batch_op.drop_constraint('fk_media_blob_id_media_blobs', type_='foreignkey')
+        batch_op.drop_column('blob_id')
+    op.drop_index('ix_media_blobs_sha256', table_name='media_blobs')
+    op.drop_index('ix_media_blobs_id', table_name='media_blobs')
+    op.drop_table('media_blobs')
+
+    with op.batch_alter_table('presentations') as batch_op:
+        batch_op.drop_column('version')
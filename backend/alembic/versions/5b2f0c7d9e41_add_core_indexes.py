@@ -0,0 +1,42 @@
+"""add core indexes
+
+Indexes for the columns tree loads, listings and ordering queries filter
+and sort on. Also backfills presentations.updated_at so listings can sort
+on the column directly instead of coalescing it with created_at.
+
+Revision ID: 5b2f0c7d9e41
+Revises: 3a7d1f0b6c52
+Create Date: 2026-10-18 13:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f0c7d9e41'
+down_revision: Union[str, None] = '3a7d1f0b6c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_slides_presentation_id_order_index", "slides", ["presentation_id", "order_index"]),
+    ("ix_content_blocks_slide_id_z_index", "content_blocks", ["slide_id", "z_index"]),
+    ("ix_presentations_updated_at_id", "presentations", ["updated_at", "id"]),
+    ("ix_presentations_created_at_id", "presentations", ["created_at", "id"]),
+    ("ix_media_uploaded_at_id", "media", ["uploaded_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    op.execute("UPDATE presentations SET updated_at = created_at WHERE updated_at IS NULL")
+    # Databases created by the app's create_all may already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,55 @@
+"""gap ordering keys
+
+Respaces slides.order_index and content_blocks.z_index 1024 apart within
+each presentation and slide, so a reorder only has to write the moved row.
+Rows keep their current order, ties broken by id.
+
+Revision ID: 9c41e6a2b7d3
+Revises: 5b2f0c7d9e41
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41e6a2b7d3'
+down_revision: Union[str, None] = '5b2f0c7d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_GAP = 1024
+
+# (table, scope column, ordering key column)
+SCOPES = [
+    ("slides", "presentation_id", "order_index"),
+    ("content_blocks", "slide_id", "z_index"),
+]
+
+
+def _renumber(key) -> None:
+    """Rewrite every scope's keys as key(rank), rank counting from 0"""
+    conn = op.get_bind()
+    for table, scope, column in SCOPES:
+        rows = conn.execute(sa.text(
+            f"SELECT id, {scope} FROM {table} ORDER BY {scope}, {column}, id"
+        )).all()
+        values = []
+        previous_scope, rank = None, 0
+        for row_id, scope_id in rows:
+            rank = rank + 1 if scope_id == previous_scope else 0
+            previous_scope = scope_id
+            values.append({"id": row_id, "key": key(rank)})
+        if values:
+            conn.execute(sa.text(f"UPDATE {table} SET {column} = :key WHERE id = :id"), values)
+
+
+def upgrade() -> None:
+    _renumber(lambda rank: (rank + 1) * ORDER_GAP)
+
+
+def downgrade() -> None:
+    _renumber(lambda rank: rank)
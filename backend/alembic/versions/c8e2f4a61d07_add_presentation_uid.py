@@ -0,0 +1,49 @@
+"""add presentation uid
+
+Adds presentations.uid, a random value per row that ETags include along
+with the version, so a presentation that reuses a deleted one's id never
+matches the old one's validators. Existing rows get a fresh uid each.
+
+Revision ID: c8e2f4a61d07
+Revises: 9c41e6a2b7d3
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f4a61d07'
+down_revision: Union[str, None] = '9c41e6a2b7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> set:
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    # Databases created by a newer create_all already have it
+    if 'uid' in _columns('presentations'):
+        return
+    op.add_column('presentations', sa.Column('uid', sa.String(32)))
+
+    conn = op.get_bind()
+    ids = conn.execute(sa.text("SELECT id FROM presentations")).scalars().all()
+    if ids:
+        conn.execute(
+            sa.text("UPDATE presentations SET uid = :uid WHERE id = :id"),
+            [{"id": presentation_id, "uid": uuid.uuid4().hex} for presentation_id in ids]
+        )
+    with op.batch_alter_table('presentations') as batch_op:
+        batch_op.alter_column('uid', existing_type=sa.String(32), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('presentations') as batch_op:
+        batch_op.drop_column('uid')
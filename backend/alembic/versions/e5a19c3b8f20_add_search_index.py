@@ -0,0 +1,122 @@
+"""add search index
+
+Full-text index over presentation titles and descriptions, slide titles
+and text block content. On SQLite it is one FTS5 table, filled from the
+existing rows and kept in sync by triggers, keyed by id * 4 + kind; on
+Postgres, expression GIN indexes that the search queries repeat.
+
+Revision ID: e5a19c3b8f20
+Revises: c8e2f4a61d07
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a19c3b8f20'
+down_revision: Union[str, None] = 'c8e2f4a61d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_BLOCK_ROW = """
+        INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+        SELECT new.id * 4 + 3, s.presentation_id, new.slide_id, NULL, new.content
+        FROM slides s
+        WHERE s.id = new.slide_id AND new.type = 'text' AND new.content IS NOT NULL;
+"""
+
+SQLITE_TABLE = """CREATE VIRTUAL TABLE search_index USING fts5(
+    presentation_id UNINDEXED, slide_id UNINDEXED, title, body,
+    tokenize = 'porter unicode61'
+)"""
+
+SQLITE_TRIGGERS = {
+    "search_presentations_ai": """AFTER INSERT ON presentations BEGIN
+        INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+        VALUES (new.id * 4 + 1, new.id, NULL, new.title, new.description);
+    END""",
+    "search_presentations_au": """AFTER UPDATE OF title, description ON presentations BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+        VALUES (new.id * 4 + 1, new.id, NULL, new.title, new.description);
+    END""",
+    "search_presentations_ad": """AFTER DELETE ON presentations BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END""",
+    "search_slides_ai": """AFTER INSERT ON slides BEGIN
+        INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+        VALUES (new.id * 4 + 2, new.presentation_id, new.id, new.title, NULL);
+    END""",
+    "search_slides_au": """AFTER UPDATE OF title ON slides BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+        VALUES (new.id * 4 + 2, new.presentation_id, new.id, new.title, NULL);
+    END""",
+    "search_slides_ad": """AFTER DELETE ON slides BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END""",
+    "search_blocks_ai": f"""AFTER INSERT ON content_blocks BEGIN
+        {SQLITE_BLOCK_ROW}
+    END""",
+    "search_blocks_au": f"""AFTER UPDATE OF content, type, slide_id ON content_blocks BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        {SQLITE_BLOCK_ROW}
+    END""",
+    "search_blocks_ad": """AFTER DELETE ON content_blocks BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END""",
+}
+
+SQLITE_BACKFILL = [
+    """INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+    SELECT id * 4 + 1, id, NULL, title, description FROM presentations""",
+    """INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+    SELECT id * 4 + 2, presentation_id, id, title, NULL FROM slides""",
+    """INSERT INTO search_index (rowid, presentation_id, slide_id, title, body)
+    SELECT b.id * 4 + 3, s.presentation_id, b.slide_id, NULL, b.content
+    FROM content_blocks b JOIN slides s ON s.id = b.slide_id
+    WHERE b.type = 'text' AND b.content IS NOT NULL""",
+]
+
+# Must match PG_*_DOC in app/services/search_service.py
+PG_INDEXES = {
+    "ix_presentations_search": (
+        "presentations", "coalesce(title, '') || ' ' || coalesce(description, '')", ""
+    ),
+    "ix_slides_search": ("slides", "coalesce(title, '')", ""),
+    "ix_content_blocks_search": ("content_blocks", "coalesce(content, '')", " WHERE type = 'text'"),
+}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Databases indexed by an older app at startup already have it
+        if sa.inspect(op.get_bind()).has_table('search_index'):
+            return
+        op.execute(SQLITE_TABLE)
+        for name, body in SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER {name} {body}")
+        for statement in SQLITE_BACKFILL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for name, (table, document, where) in PG_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+                f"USING GIN (to_tsvector('english', {document})){where}"
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS search_index")
+    elif dialect == 'postgresql':
+        for name in PG_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -13,8 +13,21 @@ class Settings(BaseSettings):
         "sqlite:///./edupresent.db"  # SQLite fallback
     )
 
+    # Connection pool (server databases; SQLite keeps SQLAlchemy's defaults)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced
+    db_pool_pre_ping: bool = True
+
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait on a locked database
+
     # API Keys
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    openai_base_url: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 
     # Security
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -26,13 +39,53 @@ class Settings(BaseSettings):
 
     # Media Storage
     upload_path: str = "uploads"
+    # Uploads in progress; not served, and must share upload_path's filesystem
+    # so finished files can be renamed into place
+    upload_temp_path: str = "uploads_tmp"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
+    upload_chunk_size: int = 1024 * 1024  # Uploads are copied to disk 1MB at a time
     allowed_extensions: set = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp4", ".mov", ".avi"}
+    media_workers: int = 2
+    media_derivative_widths: dict = {"thumbnail": 320, "editor": 1280, "full": 1920}
+    media_derivative_quality: int = 82
+
+    # Presentation tree cache
+    tree_cache_max_size: int = 64 * 1024 * 1024  # Encoded presentation trees, per worker
+
+    # Response compression (brotli when installed, else gzip)
+    compression_minimum_size: int = 1024  # Bytes; smaller bodies are sent as-is
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Export
+    export_cache_path: str = "cache/exports"
+    export_cache_max_size: int = 1024 * 1024 * 1024  # 1GB
+    export_workers: int = 2
+    export_max_queue_depth: int = 32
+    export_sync_max_slides: int = 20  # Smaller decks render inline
+    export_job_ttl: int = 3600  # Seconds finished jobs stay downloadable
+    export_bulk_window: int = 4  # Presentations loaded and rendering at once per bulk export
+    export_bulk_max_presentations: int = 5000
+    export_image_cache_path: str = "cache/export_images"
+    export_image_dpi: int = 150
+    export_image_quality: int = 80
 
     # AI Settings
     default_model: str = "gpt-4"
     max_tokens: int = 2000
     temperature: float = 0.7
+    ai_max_concurrency: int = 16  # Upstream calls in flight per worker
+    ai_max_connections: int = 32
+    ai_max_retries: int = 4
+    ai_retry_base_delay: float = 0.5
+    ai_retry_max_delay: float = 20.0
+    ai_timeout: float = 120.0
+    ai_batch_token_budget: int = 800  # Estimated input tokens packed into one call
+    ai_batch_max_blocks: int = 20
+    ai_batch_concurrency: int = 4  # Model calls in flight per batch request
+    ai_cache_path: str = "cache/ai_cache.db"
+    ai_cache_ttl: int = 7 * 24 * 3600  # 1 week
+    ai_cache_max_entries: int = 10000
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,115 @@
-from sqlalchemy import create_engine
+import os
+from typing import Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-engine = create_engine(settings.database_url)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The same database with its async driver (aiosqlite or asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str) -> Dict:
+    """create_engine keyword arguments from the pool settings"""
+    if is_sqlite(url):
+        # The driver-level timeout covers locks taken before the pragmas run
+        return {"connect_args": {"timeout": settings.sqlite_busy_timeout / 1000}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # WAL lets readers run alongside the single writer, and busy_timeout makes
+    # a writer wait for the lock instead of failing with "database is locked".
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    cursor.close()
+
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+def upgrade_schema(bind: Engine) -> None:
+    """Apply the Alembic migrations the database hasn't had yet.
+
+    Tables come from create_all; what it can't express, like the full-text
+    search index, only exists in migrations.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file, so alembic leaves the app's logging configuration alone
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def pool_report(engine: Engine) -> str:
+    """One-line summary of an engine's effective pool configuration"""
+    pool = engine.pool
+    parts = [f"driver={engine.dialect.name}+{engine.dialect.driver}", f"pool={type(pool).__name__}"]
+    if hasattr(pool, "size"):
+        parts.append(f"size={pool.size()}")
+    for name, attr in (("max_overflow", "_max_overflow"), ("timeout", "_timeout"),
+                       ("recycle", "_recycle"), ("pre_ping", "_pre_ping")):
+        if hasattr(pool, attr):
+            parts.append(f"{name}={getattr(pool, attr)}")
+    if engine.dialect.name == "sqlite" and not engine.dialect.is_async:
+        # Both engines run the same connect hook, so checking one suffices
+        with engine.connect() as conn:
+            parts.extend(
+                f"{pragma}={conn.exec_driver_sql(f'PRAGMA {pragma}').scalar()}"
+                for pragma in ("journal_mode", "synchronous", "busy_timeout")
+            )
+    return " ".join(parts)
+
+
+# The sync engine serves schema creation, background tasks and worker
+# processes; request handlers use the async engine so queries don't block
+# the event loop.
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_options = engine_options(settings.database_url)
+if is_sqlite(settings.database_url):
+    # aiosqlite defaults to NullPool, reconnecting (and re-running the
+    # pragmas) on every request; keep connections like the sync engine does
+    async_options["poolclass"] = AsyncAdaptedQueuePool
+async_engine = create_async_engine(async_database_url(settings.database_url), **async_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if is_sqlite(settings.database_url):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
 Base = declarative_base()
 
 def get_db():
@@ -13,4 +117,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Request-scoped AsyncSession. Services keep their sync Session API and
+    are called through `await db.run_sync(Service.method, ...)`."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import sys
@@ -8,16 +9,25 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, async_engine, Base, pool_report, upgrade_schema
 from app.routers import presentations, ai, export, media
+from app.services.export_jobs import export_jobs
+from app.services.image_derivatives import shutdown_derivative_executor
+from app.services.ai_client import ai_client
+from app.utils.compression import CompressionMiddleware
 
-# Create database tables
+# Create database tables, then apply the migrations they don't cover
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+print(f"Database pool (sync): {pool_report(engine)}")
+print(f"Database pool (async): {pool_report(async_engine.sync_engine)}")
 
 app = FastAPI(
     title="EduPresent API",
     description="AI-Powered Educational Content Creation Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -27,10 +37,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality
 )
 
 # Create upload directory if it doesn't exist
 os.makedirs(settings.upload_path, exist_ok=True)
+os.makedirs(settings.upload_temp_path, exist_ok=True)
 
 # Static files
 app.mount("/uploads", StaticFiles(directory=settings.upload_path), name="uploads")
@@ -41,6 +60,12 @@ app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
 app.include_router(export.router, prefix="/api/export", tags=["export"])
 app.include_router(media.router, prefix="/api/media", tags=["media"])
 
+@app.on_event("shutdown")
+async def shutdown_workers():
+    export_jobs.shutdown()
+    shutdown_derivative_executor()
+    await ai_client.aclose()
+
 @app.get("/")
 async def root():
     return {"message": "EduPresent API is running!"}
@@ -2,5 +2,7 @@ from .presentation import Presentation
 from .slide import Slide
 from .content_block import ContentBlock
 from .media import Media
+from .media_blob import MediaBlob
+from .media_derivative import MediaDerivative
 
-__all__ = ["Presentation", "Slide", "ContentBlock", "Media"]
\ No newline at end of file
+__all__ = ["Presentation", "Slide", "ContentBlock", "Media", "MediaBlob", "MediaDerivative"]
\ No newline at end of file
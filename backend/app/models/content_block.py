@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 
 class ContentBlock(Base):
     __tablename__ = "content_blocks"
+    __table_args__ = (
+        Index("ix_content_blocks_slide_id_z_index", "slide_id", "z_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     slide_id = Column(Integer, ForeignKey("slides.id"), nullable=False)
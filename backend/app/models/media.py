@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
 
 
 class Media(Base):
     __tablename__ = "media"
+    __table_args__ = (
+        Index("ix_media_uploaded_at_id", "uploaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
@@ -15,3 +19,7 @@ class Media(Base):
     width = Column(Integer)
     height = Column(Integer)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    blob_id = Column(Integer, ForeignKey("media_blobs.id"))  # Null for files stored before deduplication
+
+    # Relationships
+    blob = relationship("MediaBlob", back_populates="media")
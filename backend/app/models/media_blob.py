@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class MediaBlob(Base):
+    """A stored file, shared by every Media row with the same content"""
+    __tablename__ = "media_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    width = Column(Integer)
+    height = Column(Integer)
+    ref_count = Column(Integer, nullable=False, default=0)  # Media rows pointing here
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    media = relationship("Media", back_populates="blob")
+    derivatives = relationship("MediaDerivative", back_populates="blob", cascade="all, delete-orphan")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class MediaDerivative(Base):
+    """A resized, re-encoded copy of an image blob"""
+    __tablename__ = "media_derivatives"
+    __table_args__ = (UniqueConstraint("blob_id", "variant", "format"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_id = Column(Integer, ForeignKey("media_blobs.id"), nullable=False, index=True)
+    variant = Column(String(50), nullable=False)  # thumbnail, editor, full
+    format = Column(String(10), nullable=False)  # jpeg, webp
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+
+    # Relationships
+    blob = relationship("MediaBlob", back_populates="derivatives")
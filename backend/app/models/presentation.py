@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON
+import uuid
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -6,6 +7,11 @@ from ..database import Base
 
 class Presentation(Base):
     __tablename__ = "presentations"
+    __table_args__ = (
+        # Keyset pagination sorts on (timestamp, id)
+        Index("ix_presentations_updated_at_id", "updated_at", "id"),
+        Index("ix_presentations_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -13,8 +19,16 @@ class Presentation(Base):
     theme = Column(String(50), default="default")
     settings = Column(JSON, default={})
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     is_template = Column(Boolean, default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every write
+    # Random per row; SQLite can reuse a deleted row's id, so ETags carry this too
+    uid = Column(String(32), nullable=False, default=lambda: uuid.uuid4().hex)
 
     # Relationships
-    slides = relationship("Slide", back_populates="presentation", cascade="all, delete-orphan")
\ No newline at end of file
+    slides = relationship(
+        "Slide",
+        back_populates="presentation",
+        cascade="all, delete-orphan",
+        order_by="Slide.order_index"
+    )
\ No newline at end of file
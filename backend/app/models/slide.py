@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 
 class Slide(Base):
     __tablename__ = "slides"
+    __table_args__ = (
+        # Tree loads and reordering filter by presentation and sort by position
+        Index("ix_slides_presentation_id_order_index", "presentation_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     presentation_id = Column(Integer, ForeignKey("presentations.id"), nullable=False)
@@ -16,4 +20,9 @@ class Slide(Base):
 
     # Relationships
     presentation = relationship("Presentation", back_populates="slides")
-    content_blocks = relationship("ContentBlock", back_populates="slide", cascade="all, delete-orphan")
\ No newline at end of file
+    content_blocks = relationship(
+        "ContentBlock",
+        back_populates="slide",
+        cascade="all, delete-orphan",
+        order_by="ContentBlock.z_index"
+    )
\ No newline at end of file
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict
+import json
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Dict, List
+from ..database import get_async_db
 from ..services.ai_service import AIService
+from ..services.presentation_service import PresentationService, VersionConflictError
+from ..services.ai_cache import ai_cache
 
 router = APIRouter()
 
@@ -9,10 +15,23 @@ class GeneratePresentationRequest(BaseModel):
     prompt: str
     num_slides: Optional[int] = 5
     theme: Optional[str] = "default"
+    use_cache: Optional[bool] = True  # False forces a fresh completion
 
 class EnhanceContentRequest(BaseModel):
     content: str
     enhancement_type: Optional[str] = "improve"  # improve, summarize, expand, simplify
+    use_cache: Optional[bool] = True
+
+class BatchBlock(BaseModel):
+    id: Optional[int] = None  # ContentBlock ID; required to persist
+    content: str
+
+class EnhanceBatchRequest(BaseModel):
+    blocks: Optional[List[BatchBlock]] = Field(None, max_length=1000)
+    presentation_id: Optional[int] = None  # Enhance every text block of this presentation
+    enhancement_type: Optional[str] = "improve"
+    use_cache: Optional[bool] = True
+    persist: Optional[bool] = False  # Write results back to the content blocks
 
 @router.post("/generate-presentation")
 async def generate_presentation(request: GeneratePresentationRequest):
@@ -20,25 +39,121 @@ async def generate_presentation(request: GeneratePresentationRequest):
     try:
         result = await AIService.generate_presentation(
             request.prompt,
-            request.num_slides
+            request.num_slides,
+            use_cache=request.use_cache
         )
         result["theme"] = request.theme
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/generate-presentation/stream")
+async def stream_presentation(request: GeneratePresentationRequest):
+    """Generate a presentation using AI, sent as server-sent events.
+
+    Emits one `slide` event per slide as soon as it is complete, then a
+    `done` event with the full presentation, or an `error` event.
+    """
+    async def events():
+        index = 0
+        try:
+            async for event, data in AIService.stream_presentation(
+                request.prompt,
+                request.num_slides,
+                use_cache=request.use_cache
+            ):
+                if event == "slide":
+                    yield _sse("slide", {"index": index, "slide": data})
+                    index += 1
+                else:
+                    data["theme"] = request.theme
+                    yield _sse("done", data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/enhance-content")
 async def enhance_content(request: EnhanceContentRequest):
     """Enhance existing content using AI"""
     try:
         enhanced_content = await AIService.enhance_content(
             request.content,
-            request.enhancement_type
+            request.enhancement_type,
+            use_cache=request.use_cache
         )
         return {"enhanced_content": enhanced_content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/enhance-content/batch")
+async def enhance_content_batch(request: EnhanceBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Enhance many content blocks at once.
+
+    Takes either a list of blocks or a presentation ID. Blocks are packed
+    several to a model call; with persist the results are written back to
+    the content blocks and the affected presentations' versions bumped, or
+    409 is returned if any of them was edited while the model ran.
+    """
+    if (request.blocks is None) == (request.presentation_id is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of blocks or presentation_id")
+
+    # Versions are read before the blocks, and the write-back only applies
+    # if nothing was edited in between or during the model calls
+    if request.presentation_id is not None:
+        version = await db.run_sync(PresentationService.get_version, request.presentation_id)
+        blocks = await db.run_sync(PresentationService.list_text_blocks, request.presentation_id)
+        if version is None or blocks is None:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        base_versions = {request.presentation_id: version}
+    else:
+        blocks = [block.model_dump() for block in request.blocks]
+        base_versions = {}
+        if request.persist:
+            if any(block["id"] is None for block in blocks):
+                raise HTTPException(status_code=422, detail="Every block needs an id to persist")
+            base_versions = await db.run_sync(
+                PresentationService.block_versions, [block["id"] for block in blocks]
+            )
+    # Don't hold a connection through the model calls
+    await db.rollback()
+
+    try:
+        enhanced = await AIService.enhance_batch(
+            [block["content"] for block in blocks],
+            request.enhancement_type,
+            use_cache=request.use_cache
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = [
+        {"block_id": block["id"], "enhanced_content": text}
+        for block, text in zip(blocks, enhanced)
+    ]
+    versions = {}
+    if request.persist:
+        try:
+            versions = await db.run_sync(
+                PresentationService.update_block_contents,
+                {block["id"]: text for block, text in zip(blocks, enhanced)},
+                base_versions
+            )
+        except VersionConflictError as e:
+            raise HTTPException(status_code=409, detail={
+                "message": "Presentation has changed",
+                "presentation_id": e.presentation_id,
+                "version": e.current_version
+            })
+    return {"results": results, "persisted": bool(request.persist), "versions": versions}
+
 @router.post("/suggest-images")
 async def suggest_images(prompt: str):
     """Suggest image prompts for content"""
@@ -53,3 +168,8 @@ async def suggest_images(prompt: str):
         return {"image_suggestions": suggestions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the AI response cache"""
+    return ai_cache.stats()
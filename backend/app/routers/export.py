@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Optional
-
-from ..database import get_db
-from ..services.export_service import ExportService
+from datetime import datetime
+from typing import List, Optional
+
+from ..database import get_async_db
+from ..config import settings
+from ..services.bulk_export import bulk_exports
+from ..services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from ..services.export_cache import ExportCache, export_cache
+from ..services.export_jobs import QueueFullError, export_jobs
 from ..services.presentation_service import PresentationService
+from ..services.preview_service import PreviewService
+from ..utils.helpers import etag_matches
 
 router = APIRouter()
 
@@ -13,90 +22,209 @@ router = APIRouter()
 class ExportRequest(BaseModel):
     presentation_id: int
     format: str  # pdf, pptx, html
-    options: Optional[dict] = {}
+    options: Optional[dict] = {}  # Accepted but unused; the exporters take no options
 
 
-@router.post("/pdf/{presentation_id}")
-async def export_pdf(presentation_id: int, db: Session = Depends(get_db)):
-    """Export presentation to PDF"""
-    presentation = PresentationService.get_presentation_with_slides(db, presentation_id)
-    if not presentation:
+class BulkExportRequest(BaseModel):
+    format: str  # pdf, pptx
+    presentation_ids: Optional[List[int]] = None
+    # Filters, applied together (and to presentation_ids when given)
+    is_template: Optional[bool] = None
+    updated_since: Optional[datetime] = None
+
+
+def _download_name(title: str, export_format: str) -> str:
+    return f"{title.replace(' ', '_')}.{export_format}"
+
+
+async def _export_response(presentation_id: int, export_format: str, if_none_match: Optional[str], db: AsyncSession):
+    """Serve an export from the artifact cache, rendering it on a miss"""
+    tree = await db.run_sync(PresentationService.get_presentation_tree, presentation_id)
+    if tree is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
+    presentation = tree.data
+
+    key = ExportCache.cache_key(presentation, export_format)
+    etag = f'"{key}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    path = export_cache.get(key, export_format)
+    if path is None:
+        try:
+            if len(presentation['slides']) <= settings.export_sync_max_slides:
+                # Small, but rendering still blocks: keep it off the event loop
+                path = await anyio.to_thread.run_sync(
+                    export_cache.put, key, export_format,
+                    lambda output: ExportService.render(presentation, export_format, output)
+                )
+            else:
+                job = await export_jobs.run(presentation, export_format, key)
+                if job.error is not None:
+                    raise Exception(job.error)
+                path = job.path
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Export queue is full, try again later")
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"{export_format.upper()} export failed: {str(e)}"
+            )
+
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        filename=_download_name(presentation['title'], export_format),
+        headers={"ETag": etag}
+    )
 
-    try:
-        pdf_bytes = ExportService.export_to_pdf(presentation)
-        filename = f"{presentation['title'].replace(' ', '_')}.pdf"
 
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF export failed: {str(e)}")
+@router.post("/pdf/{presentation_id}")
+async def export_pdf(
+        presentation_id: int,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Export presentation to PDF"""
+    return await _export_response(presentation_id, "pdf", if_none_match, db)
 
 
 @router.post("/pptx/{presentation_id}")
-async def export_pptx(presentation_id: int, db: Session = Depends(get_db)):
+async def export_pptx(
+        presentation_id: int,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """Export presentation to PowerPoint"""
-    presentation = PresentationService.get_presentation_with_slides(db, presentation_id)
-    if not presentation:
-        raise HTTPException(status_code=404, detail="Presentation not found")
-
-    try:
-        pptx_bytes = ExportService.export_to_pptx(presentation)
-        filename = f"{presentation['title'].replace(' ', '_')}.pptx"
+    return await _export_response(presentation_id, "pptx", if_none_match, db)
 
-        return Response(
-            content=pptx_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PPTX export failed: {str(e)}")
 
+@router.post("/jobs", status_code=202)
+async def submit_export_job(request: ExportRequest, db: AsyncSession = Depends(get_async_db)):
+    """Queue an export to render in the background worker pool"""
+    if request.format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
 
-@router.get("/preview/{presentation_id}")
-async def export_preview(presentation_id: int, db: Session = Depends(get_db)):
-    """Generate a web preview of the presentation"""
-    presentation = PresentationService.get_presentation_with_slides(db, presentation_id)
-    if not presentation:
+    tree = await db.run_sync(PresentationService.get_presentation_tree, request.presentation_id)
+    if tree is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
+    presentation = tree.data
 
-    # Generate HTML preview
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>{presentation['title']}</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
-            .slide {{ margin-bottom: 40px; border: 1px solid #ddd; padding: 20px; }}
-            .slide-title {{ font-size: 24px; font-weight: bold; margin-bottom: 15px; }}
-            .content-block {{ margin-bottom: 15px; }}
-            .text-block {{ font-size: 16px; line-height: 1.6; }}
-            .image-block {{ max-width: 100%; height: auto; }}
-        </style>
-    </head>
-    <body>
-        <h1>{presentation['title']}</h1>
-        <p>{presentation.get('description', '')}</p>
+    key = ExportCache.cache_key(presentation, request.format)
+    try:
+        job = export_jobs.submit(presentation, request.format, key)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Export queue is full, try again later")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str):
+    """Get the status and timing of an export job"""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(job_id: str, if_none_match: Optional[str] = Header(None)):
+    """Download the output of a completed export job"""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+
+    etag = f'"{job.key}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    path = export_cache.get(job.key, job.format)
+    if path is None:
+        raise HTTPException(status_code=410, detail="Export output has expired")
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES[job.format],
+        filename=_download_name(job.title, job.format),
+        headers={"ETag": etag}
+    )
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_export_job(job_id: str):
+    """Cancel a queued or running export job"""
+    job = export_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+
+@router.post("/bulk")
+async def bulk_export(request: BulkExportRequest, db: AsyncSession = Depends(get_async_db)):
+    """Export many presentations as one ZIP, streamed as each file finishes rendering.
+
+    Requested presentation_ids that don't exist are listed as not found in
+    the archive's manifest.json and the export's failures. The export's ID is sent in X-Export-Id for polling GET /bulk/{export_id}.
     """
+    if request.format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    if request.presentation_ids is None and request.is_template is None and request.updated_since is None:
+        raise HTTPException(status_code=400, detail="Give presentation_ids or at least one filter")
+
+    limit = settings.export_bulk_max_presentations
+    presentation_ids = await db.run_sync(
+        PresentationService.select_presentation_ids, request.presentation_ids,
+        request.is_template, request.updated_since, limit + 1
+    )
+    if not presentation_ids:
+        raise HTTPException(status_code=404, detail="No presentations matched")
+    if len(presentation_ids) > limit:
+        raise HTTPException(status_code=413, detail=f"At most {limit} presentations per bulk export")
+    # Requested IDs that exist but don't pass the filters are left out
+    # silently; ones that don't exist are reported as not found
+    missing_ids = []
+    if request.presentation_ids:
+        missing_ids = await db.run_sync(PresentationService.missing_presentation_ids, request.presentation_ids)
+
+    export = bulk_exports.create(presentation_ids, request.format, missing_ids)
+    return StreamingResponse(
+        bulk_exports.stream(export),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="presentations_{export.id[:8]}.zip"',
+            "X-Export-Id": export.id
+        }
+    )
+
+
+@router.get("/bulk/{export_id}")
+async def get_bulk_export(export_id: str):
+    """Get the progress of a bulk export"""
+    export = bulk_exports.get(export_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Bulk export not found")
+    return export.to_dict()
+
+
+@router.delete("/bulk/{export_id}")
+async def cancel_bulk_export(export_id: str):
+    """Stop a bulk export; the archive ends after the file being written"""
+    export = bulk_exports.cancel(export_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Bulk export not found")
+    return export.to_dict()
 
-    for i, slide in enumerate(presentation['slides'], 1):
-        html_content += f"""
-        <div class="slide">
-            <div class="slide-title">Slide {i}: {slide.get('title', 'Untitled')}</div>
-        """
 
-        for block in slide.get('content_blocks', []):
-            if block['type'] == 'text':
-                html_content += f'<div class="content-block text-block">{block["content"]}</div>'
-            elif block['type'] == 'image':
-                html_content += f'<div class="content-block"><img class="image-block" src="{block.get("file_path", "")}" alt="Image"></div>'
-
-        html_content += "</div>"
-
-    html_content += "</body></html>"
+@router.get("/preview/{presentation_id}")
+async def export_preview(presentation_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Generate a web preview of the presentation, streamed slide by slide"""
+    presentation = await db.run_sync(PresentationService.get_presentation_summary, presentation_id)
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
 
-    return Response(content=html_content, media_type="text/html")
+    slides = PresentationService.aiter_slides(db, presentation_id)
+    return StreamingResponse(
+        PreviewService.iter_html(presentation, slides),
+        media_type="text/html"
+    )
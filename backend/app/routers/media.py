@@ -1,51 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import Message
+from typing import Callable, List, Optional
 import os
 
-from ..database import get_db
-from ..models import Media
-from ..services.media_service import MediaService
+from ..database import get_async_db
+from ..services.media_service import MediaService, UploadTooLargeError
 from ..config import settings
 
-router = APIRouter()
+# Room for the multipart boundaries, part headers and form fields around the file
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadLimitRoute(APIRoute):
+    """Enforces the upload size limit on the request body itself.
+
+    FastAPI reads and spools the whole multipart body before the handler
+    runs, so checks in the handler come too late. This rejects a body
+    declared too large by Content-Length before any of it is read, and
+    stops reading one without a declared length once it passes the limit.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            limit = settings.max_file_size + FORM_OVERHEAD
+            content_length = request.headers.get("content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+                raise HTTPException(status_code=413, detail="File too large")
+
+            received = 0
+
+            async def receive() -> Message:
+                nonlocal received
+                message = await request.receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise HTTPException(status_code=413, detail="File too large")
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadLimitRoute)
 
 
 @router.post("/upload")
 async def upload_media(
+        background_tasks: BackgroundTasks,
         file: UploadFile = File(...),
-        db: Session = Depends(get_db)
+        sha256: Optional[str] = Form(None),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload media file"""
-    # Validate file size
-    if file.size > settings.max_file_size:
-        raise HTTPException(status_code=413, detail="File too large")
+    """Upload media file. Clients may send the file's SHA-256 to skip storing known content.
 
+    Bodies over the size limit are cut off by UploadLimitRoute; the exact
+    limit on the file itself is checked as it is copied to disk.
+    """
     # Validate file extension
     file_extension = os.path.splitext(file.filename)[1].lower()
     if file_extension not in settings.allowed_extensions:
         raise HTTPException(status_code=400, detail="File type not allowed")
 
     try:
-        # Read file content
-        file_content = await file.read()
-
-        # Save file
-        file_metadata = await MediaService.save_uploaded_file(
-            file_content, file.filename, file.content_type
-        )
-
-        # Optimize image if applicable
-        if file.content_type.startswith('image/'):
-            optimized_path = MediaService.optimize_image(file_metadata['file_path'])
-            if optimized_path != file_metadata['file_path']:
-                file_metadata['optimized_path'] = optimized_path
-
-        # Save to database
-        media = Media(**file_metadata)
-        db.add(media)
-        db.commit()
-        db.refresh(media)
+        # Stream file to disk, sharing storage with identical uploads
+        media, stored = await MediaService.create_media(db, file, sha256)
+
+        # Resized variants are rendered after the response goes out
+        if stored and media.mime_type.startswith('image/'):
+            background_tasks.add_task(MediaService.generate_derivatives, media.blob_id)
 
         return {
             "id": media.id,
@@ -55,49 +84,72 @@ async def upload_media(
             "file_size": media.file_size,
             "mime_type": media.mime_type,
             "width": media.width,
-            "height": media.height
+            "height": media.height,
+            "sha256": media.blob.sha256,
+            "deduplicated": not stored
         }
 
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 @router.get("/")
-async def get_media(db: Session = Depends(get_db)):
-    """Get all uploaded media"""
-    media_files = db.query(Media).all()
-    return [
-        {
-            "id": m.id,
-            "filename": m.filename,
-            "original_filename": m.original_filename,
-            "file_path": f"/uploads/{m.filename}",
-            "file_size": m.file_size,
-            "mime_type": m.mime_type,
-            "width": m.width,
-            "height": m.height,
-            "uploaded_at": m.uploaded_at
-        }
-        for m in media_files
-    ]
+async def get_media(
+        response: Response,
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Get uploaded media, newest first. The next page cursor is sent in X-Next-Cursor."""
+    try:
+        media_files, next_cursor = await db.run_sync(MediaService.list_media, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return media_files
+
+
+@router.get("/{media_id}/derivatives")
+async def get_media_derivatives(media_id: int, db: AsyncSession = Depends(get_async_db)):
+    """List the resized variants generated for an image"""
+    derivatives = await db.run_sync(MediaService.list_derivatives, media_id)
+    if derivatives is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return derivatives
+
+
+@router.get("/{media_id}/image")
+async def get_media_image(
+        media_id: int,
+        width: int = Query(..., ge=1),
+        format: str = Query("webp", pattern="^(webp|jpeg)$"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Redirect to the smallest variant at least `width` pixels wide.
+
+    Falls back to the original until its variants have been generated.
+    """
+    media = await db.run_sync(MediaService.get_media, media_id)
+    if not media:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    derivative = await db.run_sync(MediaService.pick_derivative, media, width, format)
+    if derivative is None:
+        return RedirectResponse(f"/uploads/{media.filename}")
+    return RedirectResponse(f"/uploads/{derivative.filename}")
 
 
 @router.delete("/{media_id}")
-async def delete_media(media_id: int, db: Session = Depends(get_db)):
+async def delete_media(media_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete media file"""
-    media = db.query(Media).filter(Media.id == media_id).first()
+    media = await db.run_sync(MediaService.get_media, media_id)
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
-    # Delete file from disk
-    try:
-        if os.path.exists(media.file_path):
-            os.remove(media.file_path)
-    except:
-        pass
-
-    # Delete from database
-    db.delete(media)
-    db.commit()
+    await db.run_sync(MediaService.delete_media, media)
 
     return {"message": "Media deleted successfully"}
\ No newline at end of file
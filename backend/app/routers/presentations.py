@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional, Literal, Tuple
 from pydantic import BaseModel
 
-from ..database import get_db
-from ..models import Presentation, Slide, ContentBlock
-from ..services.presentation_service import PresentationService
+from ..database import get_async_db
+from ..services.presentation_service import (
+    PresentationService, VersionConflictError, InvalidOperationError
+)
+from ..services.search_service import SearchService
+from ..services.tree_cache import MSGPACK_MEDIA_TYPE, encode_msgpack, msgpack
+from ..utils.helpers import version_etag, parse_version_etag, etag_matches
 
 router = APIRouter()
 
@@ -15,6 +19,7 @@ class PresentationCreate(BaseModel):
     description: Optional[str] = ""
     theme: Optional[str] = "default"
     settings: Optional[Dict] = {}
+    is_template: Optional[bool] = False
     slides: Optional[List[Dict]] = []
 
 
@@ -23,17 +28,124 @@ class PresentationUpdate(BaseModel):
     description: Optional[str] = None
     theme: Optional[str] = None
     settings: Optional[Dict] = None
+    is_template: Optional[bool] = None
+
+
+class PresentationClone(BaseModel):
+    title: Optional[str] = None  # Defaults to the source's title
+    description: Optional[str] = None
+    is_template: Optional[bool] = False  # True to copy into a new template
+
+
+class BlockFields(BaseModel):
+    content: Optional[str] = None
+    metadata: Optional[Dict] = None
+    position_x: Optional[float] = None
+    position_y: Optional[float] = None
+    width: Optional[float] = None
+    height: Optional[float] = None
+    z_index: Optional[int] = None
+    styles: Optional[Dict] = None
+
+
+class NewBlock(BlockFields):
+    type: str
+
+
+class OperationData(BlockFields):
+    """Payload of a patch operation; which fields are used depends on the op.
+    Only the fields that were sent are passed on."""
+    slide_id: Optional[int] = None
+    block_id: Optional[int] = None
+    # Slides
+    title: Optional[str] = None
+    layout: Optional[str] = None
+    background: Optional[Dict] = None
+    animations: Optional[Dict] = None
+    content_blocks: Optional[List[NewBlock]] = None
+    after_slide_id: Optional[int] = None  # None places the slide first
+    order_index: Optional[int] = None  # 0-based position, instead of after_slide_id
+    # Blocks
+    type: Optional[str] = None
+    after_block_id: Optional[int] = None
+
+
+class PatchOperation(BaseModel):
+    op: Literal[
+        "add_slide", "update_slide", "move_slide", "delete_slide",
+        "add_block", "update_block", "move_block", "delete_block"
+    ]
+    slide_id: Optional[int] = None
+    block_id: Optional[int] = None
+    data: Optional[OperationData] = None
+
+
+class PresentationPatch(BaseModel):
+    version: Optional[int] = None  # May be sent as If-Match instead
+    operations: List[PatchOperation]
+
+
+class SlideMove(BaseModel):
+    after_slide_id: Optional[int] = None  # None moves the slide to the front
+
+
+class BlockMove(BaseModel):
+    slide_id: Optional[int] = None  # Target slide; defaults to the block's own
+    after_block_id: Optional[int] = None  # None moves the block to the bottom of the stack
+
+
+def _if_match_revision(if_match: str) -> Tuple[str, int]:
+    try:
+        return parse_version_etag(if_match)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+
+
+async def _base_revision(presentation_id: int, if_match: Optional[str], db: AsyncSession) -> Tuple[str, int]:
+    if if_match:
+        return _if_match_revision(if_match)
+    revision = await db.run_sync(PresentationService.get_revision, presentation_id)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    return revision
+
+
+async def _apply_operations(
+        presentation_id: int,
+        base_revision: Tuple[Optional[str], int],
+        operations: List[Dict],
+        response: Response,
+        db: AsyncSession
+):
+    base_uid, base_version = base_revision
+    try:
+        result = await db.run_sync(
+            PresentationService.apply_operations, presentation_id, base_version, operations, base_uid
+        )
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Presentation has changed", "version": e.current_version}
+        )
+    except InvalidOperationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+
+    uid, new_version, results = result
+    response.headers["ETag"] = version_etag(uid, new_version)
+    return {"version": new_version, "results": results}
 
 
 @router.post("/")
 async def create_presentation(
         presentation: PresentationCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new presentation"""
     try:
-        new_presentation = PresentationService.create_presentation(
-            db, presentation.dict()
+        new_presentation = await db.run_sync(
+            PresentationService.create_presentation, presentation.dict()
         )
         return {"id": new_presentation.id, "message": "Presentation created successfully"}
     except Exception as e:
@@ -41,58 +153,203 @@ async def create_presentation(
 
 
 @router.get("/")
-async def get_presentations(db: Session = Depends(get_db)):
-    """Get all presentations"""
-    presentations = db.query(Presentation).all()
-    return [
-        {
-            "id": p.id,
-            "title": p.title,
-            "description": p.description,
-            "theme": p.theme,
-            "created_at": p.created_at,
-            "updated_at": p.updated_at,
-            "slide_count": len(p.slides)
-        }
-        for p in presentations
-    ]
+async def get_presentations(
+        response: Response,
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        sort: str = Query("updated_at", pattern="^(updated_at|created_at)$"),
+        order: str = Query("desc", pattern="^(asc|desc)$"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Get presentation summaries a page at a time. The next page cursor is sent in X-Next-Cursor."""
+    try:
+        presentations, next_cursor = await db.run_sync(
+            PresentationService.list_presentations, limit, cursor, sort, descending=(order == "desc")
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return presentations
+
+
+@router.get("/templates")
+async def get_templates(
+        response: Response,
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        sort: str = Query("updated_at", pattern="^(updated_at|created_at)$"),
+        order: str = Query("desc", pattern="^(asc|desc)$"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Get template summaries a page at a time. Start a deck from one with POST /{id}/clone."""
+    try:
+        templates, next_cursor = await db.run_sync(
+            PresentationService.list_presentations, limit, cursor, sort,
+            descending=(order == "desc"), is_template=True
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return templates
+
+
+@router.get("/search")
+async def search_presentations(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search over presentation titles and descriptions, slide titles
+    and text blocks. Hits are ranked, with <mark>-highlighted snippets; the
+    next page cursor is sent in X-Next-Cursor."""
+    try:
+        hits, next_cursor = await db.run_sync(SearchService.search, q, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return hits
 
 
 @router.get("/{presentation_id}")
-async def get_presentation(presentation_id: int, db: Session = Depends(get_db)):
-    """Get a specific presentation with all slides and content"""
-    presentation = PresentationService.get_presentation_with_slides(db, presentation_id)
-    if not presentation:
+async def get_presentation(
+        presentation_id: int,
+        if_none_match: Optional[str] = Header(None),
+        accept: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific presentation with all slides and content.
+
+    The ETag is made from the presentation's version and a per-row uid; a
+    matching If-None-Match gets 304 without loading the tree. Send `Accept: application/msgpack` for a
+    MessagePack body instead of JSON, tagged with its own ETag.
+    """
+    variant = "msgpack" if msgpack is not None and accept and MSGPACK_MEDIA_TYPE in accept else None
+    revision = await db.run_sync(PresentationService.get_revision, presentation_id)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    headers = {"ETag": version_etag(*revision, variant), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    tree = await db.run_sync(PresentationService.get_presentation_tree, presentation_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    headers["ETag"] = version_etag(tree.uid, tree.version, variant)
+    if variant:
+        return Response(encode_msgpack(tree.data), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(tree.body, media_type="application/json", headers=headers)
+
+
+@router.post("/{presentation_id}/clone", status_code=201)
+async def clone_presentation(
+        presentation_id: int,
+        clone: Optional[PresentationClone] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Copy a presentation or template with all its slides and content blocks"""
+    clone = clone or PresentationClone()
+    new_id = await db.run_sync(
+        PresentationService.clone_presentation, presentation_id,
+        clone.title, clone.description, bool(clone.is_template)
+    )
+    if new_id is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
-    return presentation
+    return {"id": new_id, "message": "Presentation cloned successfully"}
 
 
 @router.put("/{presentation_id}")
 async def update_presentation(
         presentation_id: int,
         presentation_update: PresentationUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """Update a presentation"""
-    presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
-    if not presentation:
+    update_data = presentation_update.dict(exclude_unset=True)
+    if not await db.run_sync(PresentationService.update_presentation, presentation_id, update_data):
         raise HTTPException(status_code=404, detail="Presentation not found")
+    return {"message": "Presentation updated successfully"}
 
-    update_data = presentation_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(presentation, field, value)
 
-    db.commit()
-    return {"message": "Presentation updated successfully"}
+@router.patch("/{presentation_id}")
+async def patch_presentation(
+        presentation_id: int,
+        patch: PresentationPatch,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Apply a batch of slide and content block operations atomically.
+
+    The batch is rejected with 409 unless the presentation is still at the
+    version given in the body or If-Match header. If-Match also has to be
+    for this very presentation, not an earlier one deleted from the same id.
+    """
+    base_revision = (None, patch.version)
+    if if_match:
+        base_revision = _if_match_revision(if_match)
+    if base_revision[1] is None:
+        raise HTTPException(status_code=428, detail="A base version is required")
+
+    return await _apply_operations(
+        presentation_id, base_revision, [operation.dict(exclude_unset=True) for operation in patch.operations],
+        response, db
+    )
+
+
+@router.post("/{presentation_id}/slides/{slide_id}/move")
+async def move_slide(
+        presentation_id: int,
+        slide_id: int,
+        move: SlideMove,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Move a slide to just after another one, writing only the moved slide.
+
+    Checked against If-Match when given, otherwise applied to the current version.
+    """
+    operation = {"op": "move_slide", "slide_id": slide_id, "data": {"after_slide_id": move.after_slide_id}}
+    return await _apply_operations(
+        presentation_id, await _base_revision(presentation_id, if_match, db), [operation],
+        response, db
+    )
+
+
+@router.post("/{presentation_id}/blocks/{block_id}/move")
+async def move_block(
+        presentation_id: int,
+        block_id: int,
+        move: BlockMove,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Restack a block just above another one, optionally onto another slide.
+
+    Checked against If-Match when given, otherwise applied to the current version.
+    """
+    operation = {
+        "op": "move_block", "block_id": block_id, "slide_id": move.slide_id,
+        "data": {"after_block_id": move.after_block_id}
+    }
+    return await _apply_operations(
+        presentation_id, await _base_revision(presentation_id, if_match, db), [operation],
+        response, db
+    )
 
 
 @router.delete("/{presentation_id}")
-async def delete_presentation(presentation_id: int, db: Session = Depends(get_db)):
+async def delete_presentation(presentation_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a presentation"""
-    presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
-    if not presentation:
+    if not await db.run_sync(PresentationService.delete_presentation, presentation_id):
         raise HTTPException(status_code=404, detail="Presentation not found")
-
-    db.delete(presentation)
-    db.commit()
     return {"message": "Presentation deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from ..config import settings
+
+
+class AIResponseCache:
+    """Persistent cache of model responses, backed by a local SQLite file.
+
+    Entries expire after ttl seconds; once more than max_entries are stored
+    the least recently read ones are evicted. Survives restarts and is safe
+    to share between worker processes.
+    """
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(kind: str, **params) -> str:
+        """Stable key for a request kind and its (already normalized) parameters"""
+        payload = json.dumps({'kind': kind, **params}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl
+        }
+
+
+def normalize_text(text: str, casefold: bool = False) -> str:
+    """Collapse whitespace (and optionally case) so trivially different inputs share a key"""
+    text = ' '.join(text.split())
+    return text.casefold() if casefold else text
+
+
+ai_cache = AIResponseCache(settings.ai_cache_path, settings.ai_cache_ttl, settings.ai_cache_max_entries)
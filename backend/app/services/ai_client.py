@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import random
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from ..config import settings
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AIClientError(Exception):
+    """The model API returned an error that retrying did not resolve"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AIClient:
+    """Shared client for the chat completions API.
+
+    - one pooled HTTP/1.1 keep-alive transport for all requests
+    - at most max_concurrency requests in flight upstream
+    - identical concurrent non-streaming requests share one upstream call
+    - 429/5xx and transport errors are retried with jittered exponential
+      backoff, honouring Retry-After when the server sends it
+    """
+
+    def __init__(self, base_url: str, api_key: str, max_concurrency: int, max_connections: int,
+                 max_retries: int, retry_base_delay: float, retry_max_delay: float, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def chat(self, messages: List[Dict], model: str, max_tokens: int, temperature: float) -> str:
+        """Return the completion text, sharing the call with identical in-flight requests"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The call runs in its own task, so a caller that is cancelled
+            # (e.g. its client disconnected) stops waiting without cancelling
+            # the call for everyone else sharing it.
+            task = asyncio.ensure_future(self._complete(payload))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    async def _complete(self, payload: Dict) -> str:
+        response = await self._post("/chat/completions", payload)
+        return response.json()["choices"][0]["message"]["content"]
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller has gone
+
+    async def chat_stream(self, messages: List[Dict], model: str, max_tokens: int,
+                          temperature: float) -> AsyncIterator[str]:
+        """Yield completion text deltas as the model produces them"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        started = False
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                try:
+                    async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                            delay = self._retry_delay(attempt, response)
+                        elif response.status_code >= 400:
+                            await response.aread()
+                            raise AIClientError(response.text, response.status_code)
+                        else:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                delta = json.loads(data)["choices"][0].get("delta", {})
+                                if delta.get("content"):
+                                    started = True
+                                    yield delta["content"]
+                            return
+                except httpx.TransportError as e:
+                    # Only retry before anything has been streamed to the
+                    # caller; a restarted stream would repeat its output
+                    if started:
+                        raise AIClientError(f"Model API stream interrupted: {e}")
+                    if attempt >= self.max_retries:
+                        raise AIClientError(f"Model API unreachable: {e}")
+                    delay = self._retry_delay(attempt)
+            await asyncio.sleep(delay)
+
+    async def _post(self, path: str, payload: Dict) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                try:
+                    response = await self.client.post(path, json=payload)
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        raise AIClientError(f"Model API unreachable: {e}")
+                    response = None
+
+            if response is not None:
+                if response.status_code < 400:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise AIClientError(response.text, response.status_code)
+            # Back off outside the semaphore so waiting does not hold a slot
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if given"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.retry_max_delay)
+                except ValueError:
+                    pass
+        cap = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+ai_client = AIClient(
+    base_url=settings.openai_base_url,
+    api_key=settings.openai_api_key,
+    max_concurrency=settings.ai_max_concurrency,
+    max_connections=settings.ai_max_connections,
+    max_retries=settings.ai_max_retries,
+    retry_base_delay=settings.ai_retry_base_delay,
+    retry_max_delay=settings.ai_retry_max_delay,
+    timeout=settings.ai_timeout
+)
@@ -1,14 +1,34 @@
-import openai
-from typing import Dict, List, Optional
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from ..config import settings
+from ..utils.json_stream import JSONArrayStreamParser
+from .ai_cache import ai_cache, normalize_text
+from .ai_client import ai_client
 
-openai.api_key = settings.openai_api_key
+ENHANCE_PROMPTS = {
+    "improve": "Improve and enhance this educational content while maintaining its core message:",
+    "summarize": "Summarize this content into key points:",
+    "expand": "Expand this content with more details and examples:",
+    "simplify": "Simplify this content for easier understanding:"
+}
+
+BATCH_SYSTEM_MESSAGE = """You edit blocks of educational slide content.
+You receive an instruction and a JSON array of objects with "id" and "text".
+Apply the instruction to each text independently.
+Return only a JSON array with one object per input, in the same order, each with the same "id" and the rewritten "text".
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for batch packing"""
+    return len(text) // 4 + 1
 
 
 class AIService:
     @staticmethod
-    async def generate_presentation(prompt: str, num_slides: int = 5) -> Dict:
-        """Generate a complete presentation from a prompt"""
+    def _presentation_request(prompt: str, num_slides: int) -> Tuple[List[Dict], str]:
+        """Chat messages and cache key for a presentation generation request"""
         system_message = """You are an expert educational content creator. Generate structured presentation content in JSON format.
         Return a JSON object with:
         - title: presentation title
@@ -24,43 +44,196 @@ class AIService:
 
         user_message = f"Create a {num_slides}-slide educational presentation about: {prompt}"
 
+        cache_key = ai_cache.make_key(
+            'generate_presentation',
+            prompt=normalize_text(prompt, casefold=True),
+            num_slides=num_slides,
+            system=system_message,
+            model=settings.default_model,
+            max_tokens=settings.max_tokens,
+            temperature=settings.temperature
+        )
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        return messages, cache_key
+
+    @staticmethod
+    async def generate_presentation(prompt: str, num_slides: int = 5, use_cache: bool = True) -> Dict:
+        """Generate a complete presentation from a prompt"""
+        messages, cache_key = AIService._presentation_request(prompt, num_slides)
+        if use_cache:
+            cached = await ai_cache.aget(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+
         try:
-            response = await openai.ChatCompletion.acreate(
+            content = await ai_client.chat(
+                messages,
                 model=settings.default_model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
                 max_tokens=settings.max_tokens,
                 temperature=settings.temperature
             )
+            result = json.loads(content)
+        except Exception as e:
+            raise Exception(f"AI generation failed: {str(e)}")
+
+        await ai_cache.aset(cache_key, json.dumps(result))
+        return result
 
-            import json
-            content = response.choices[0].message.content
-            return json.loads(content)
+    @staticmethod
+    async def stream_presentation(prompt: str, num_slides: int = 5,
+                                  use_cache: bool = True) -> AsyncIterator[Tuple[str, Dict]]:
+        """Generate a presentation, yielding ("slide", slide) as each slide completes.
+
+        Ends with ("done", full_result). Uses the model's streaming mode and
+        parses the JSON incrementally, so slides arrive while later ones are
+        still being written.
+        """
+        messages, cache_key = AIService._presentation_request(prompt, num_slides)
+        if use_cache:
+            cached = await ai_cache.aget(cache_key)
+            if cached is not None:
+                result = json.loads(cached)
+                for slide in result.get('slides', []):
+                    yield 'slide', slide
+                yield 'done', result
+                return
+
+        parser = JSONArrayStreamParser('slides')
+        try:
+            stream = ai_client.chat_stream(
+                messages,
+                model=settings.default_model,
+                max_tokens=settings.max_tokens,
+                temperature=settings.temperature
+            )
+            async for delta in stream:
+                for slide in parser.feed(delta):
+                    yield 'slide', slide
+            result = parser.result()
         except Exception as e:
             raise Exception(f"AI generation failed: {str(e)}")
 
+        await ai_cache.aset(cache_key, json.dumps(result))
+        yield 'done', result
+
+    @staticmethod
+    def _enhance_cache_key(content: str, enhancement_type: str) -> str:
+        return ai_cache.make_key(
+            'enhance_content',
+            content=normalize_text(content),
+            instruction=ENHANCE_PROMPTS.get(enhancement_type),
+            model=settings.default_model,
+            max_tokens=settings.max_tokens,
+            temperature=settings.temperature
+        )
+
     @staticmethod
-    async def enhance_content(content: str, enhancement_type: str = "improve") -> str:
+    async def enhance_content(content: str, enhancement_type: str = "improve", use_cache: bool = True) -> str:
         """Enhance existing content"""
-        prompts = {
-            "improve": "Improve and enhance this educational content while maintaining its core message:",
-            "summarize": "Summarize this content into key points:",
-            "expand": "Expand this content with more details and examples:",
-            "simplify": "Simplify this content for easier understanding:"
-        }
+        cache_key = AIService._enhance_cache_key(content, enhancement_type)
+        if use_cache:
+            cached = await ai_cache.aget(cache_key)
+            if cached is not None:
+                return cached
 
         try:
-            response = await openai.ChatCompletion.acreate(
+            enhanced = await ai_client.chat(
+                [{"role": "user", "content": f"{ENHANCE_PROMPTS[enhancement_type]} {content}"}],
                 model=settings.default_model,
-                messages=[
-                    {"role": "user", "content": f"{prompts[enhancement_type]} {content}"}
-                ],
                 max_tokens=settings.max_tokens,
                 temperature=settings.temperature
             )
+        except Exception as e:
+            raise Exception(f"Content enhancement failed: {str(e)}")
+
+        await ai_cache.aset(cache_key, enhanced)
+        return enhanced
+
+    @staticmethod
+    async def enhance_batch(contents: List[str], enhancement_type: str = "improve",
+                            use_cache: bool = True) -> List[str]:
+        """Enhance many pieces of content, returned in input order.
+
+        Cache misses are packed several to a model call up to
+        ai_batch_token_budget, and the calls run at most
+        ai_batch_concurrency at a time. Results share the enhance_content
+        cache entries.
+        """
+        if enhancement_type not in ENHANCE_PROMPTS:
+            raise Exception(f"Content enhancement failed: unknown enhancement type '{enhancement_type}'")
+
+        results: List[Optional[str]] = [None] * len(contents)
+        pending: List[int] = []
+        for index, content in enumerate(contents):
+            if use_cache:
+                cached = await ai_cache.aget(AIService._enhance_cache_key(content, enhancement_type))
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            pending.append(index)
+
+        semaphore = asyncio.Semaphore(settings.ai_batch_concurrency)
 
-            return response.choices[0].message.content
+        async def run(group: List[int]) -> None:
+            async with semaphore:
+                if len(group) == 1:
+                    enhanced = [await AIService.enhance_content(contents[group[0]], enhancement_type, use_cache=False)]
+                else:
+                    enhanced = await AIService._enhance_group([contents[i] for i in group], enhancement_type)
+            for index, text in zip(group, enhanced):
+                results[index] = text
+                await ai_cache.aset(AIService._enhance_cache_key(contents[index], enhancement_type), text)
+
+        await asyncio.gather(*(run(group) for group in AIService._pack(contents, pending)))
+        return results
+
+    @staticmethod
+    def _pack(contents: List[str], indexes: List[int]) -> List[List[int]]:
+        """Group content indexes so each group fits one model call"""
+        groups: List[List[int]] = []
+        group: List[int] = []
+        tokens = 0
+        for index in indexes:
+            cost = estimate_tokens(contents[index])
+            if group and (tokens + cost > settings.ai_batch_token_budget
+                          or len(group) >= settings.ai_batch_max_blocks):
+                groups.append(group)
+                group, tokens = [], 0
+            group.append(index)
+            tokens += cost
+        if group:
+            groups.append(group)
+        return groups
+
+    @staticmethod
+    async def _enhance_group(contents: List[str], enhancement_type: str) -> List[str]:
+        """Enhance several contents in one call, falling back to one call each
+        if the model's reply cannot be matched back to the inputs"""
+        items = [{"id": i, "text": content} for i, content in enumerate(contents)]
+        try:
+            reply = await ai_client.chat(
+                [
+                    {"role": "system", "content": BATCH_SYSTEM_MESSAGE},
+                    {"role": "user", "content": f"{ENHANCE_PROMPTS[enhancement_type]}\n{json.dumps(items)}"}
+                ],
+                model=settings.default_model,
+                max_tokens=settings.max_tokens,
+                temperature=settings.temperature
+            )
         except Exception as e:
-            raise Exception(f"Content enhancement failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Content enhancement failed: {str(e)}")
+
+        try:
+            parsed = json.loads(reply[reply.index('['):reply.rindex(']') + 1])
+            by_id = {item["id"]: item["text"] for item in parsed}
+            if set(by_id) == set(range(len(contents))) and all(isinstance(t, str) for t in by_id.values()):
+                return [by_id[i] for i in range(len(contents))]
+        except (ValueError, TypeError, KeyError):
+            pass
+
+        return list(await asyncio.gather(*(
+            AIService.enhance_content(content, enhancement_type, use_cache=False) for content in contents
+        )))
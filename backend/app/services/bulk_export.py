@@ -0,0 +1,237 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+import zipfile
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import anyio
+from ..config import settings
+from ..database import AsyncSessionLocal
+from .export_cache import ExportCache, export_cache
+from .export_jobs import QueueFullError, export_jobs
+from .presentation_service import PresentationService
+
+# Exported files are read into the archive this much at a time
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# How long to wait before resubmitting when the shared export queue is full
+QUEUE_RETRY_DELAY = 1.0
+
+# The error reported for requested presentations that don't exist
+NOT_FOUND = 'not found'
+
+
+class _ChunkWriter:
+    """Unseekable file object collecting zipfile output until it is sent.
+
+    Having no seek or tell makes zipfile write each entry's sizes in a data
+    descriptor after its data, so the archive can be streamed front to back.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+class BulkExport:
+    def __init__(self, presentation_ids: List[int], export_format: str,
+                 missing_ids: Optional[List[int]] = None):
+        self.id = uuid.uuid4().hex
+        self.format = export_format
+        self.presentation_ids = presentation_ids
+        # Requested by ID but not found; reported as failed from the start
+        self.missing_ids = missing_ids or []
+        self.running = 0
+        self.completed = 0
+        self.failures: List[Dict] = [
+            {'presentation_id': presentation_id, 'error': NOT_FOUND} for presentation_id in self.missing_ids
+        ]
+        self.bytes_sent = 0
+        self.cancelled = False
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.cancelled:
+            return 'cancelled'
+        if self.finished_at is not None:
+            return 'completed'
+        return 'running'
+
+    def to_dict(self) -> Dict:
+        total = len(self.presentation_ids) + len(self.missing_ids)
+        done = self.completed + len(self.failures)
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'total': total,
+            'completed': self.completed,
+            'failed': len(self.failures),
+            'rendering': self.running,
+            'queued': total - done - self.running,
+            'progress': round(done / total, 3) if total else 1.0,
+            'bytes_sent': self.bytes_sent,
+            'failures': self.failures,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.started_at, 3)
+        }
+
+
+class BulkExportManager:
+    """Streams many presentations as one ZIP, rendering them through the export worker pool.
+
+    At most `window` presentations are loaded and rendering at a time, and
+    each finished file is copied into the archive in chunks as soon as it is
+    ready, so memory stays flat however many presentations are exported.
+    """
+
+    def __init__(self, window: int, job_ttl: int):
+        self.window = window
+        self.job_ttl = job_ttl
+        self._exports: Dict[str, BulkExport] = {}
+        self._lock = threading.Lock()
+
+    def create(self, presentation_ids: List[int], export_format: str,
+               missing_ids: Optional[List[int]] = None) -> BulkExport:
+        export = BulkExport(presentation_ids, export_format, missing_ids)
+        with self._lock:
+            self._prune()
+            self._exports[export.id] = export
+        return export
+
+    def get(self, export_id: str) -> Optional[BulkExport]:
+        return self._exports.get(export_id)
+
+    def cancel(self, export_id: str) -> Optional[BulkExport]:
+        """Stop a running export; the archive is cut short after the current file"""
+        export = self._exports.get(export_id)
+        if export is not None and export.finished_at is None:
+            export.cancelled = True
+        return export
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            export_id for export_id, export in self._exports.items()
+            if export.finished_at is not None and export.finished_at < cutoff
+        ]
+        for export_id in expired:
+            del self._exports[export_id]
+
+    @staticmethod
+    def _entry_name(presentation_id: int, title: str, export_format: str) -> str:
+        # IDs keep names unique when titles repeat
+        safe_title = re.sub(r'[^\w\-]+', '_', title).strip('_')[:80] or 'presentation'
+        return f"{presentation_id}_{safe_title}.{export_format}"
+
+    async def _render(self, presentation_id: int, export_format: str) -> Tuple[str, str]:
+        """Render one presentation, or take it from the export cache. Returns (entry name, path)."""
+        async with AsyncSessionLocal() as db:
+            tree = await db.run_sync(PresentationService.get_presentation_tree, presentation_id)
+        if tree is None:
+            # Deleted since the export started
+            raise LookupError(NOT_FOUND)
+        presentation = tree.data
+        name = self._entry_name(presentation_id, presentation['title'], export_format)
+
+        key = ExportCache.cache_key(presentation, export_format)
+        path = export_cache.get(key, export_format)
+        if path is not None:
+            return name, path
+        while True:
+            try:
+                job = await export_jobs.run(presentation, export_format, key)
+                break
+            except QueueFullError:
+                # Interactive exports share the queue; wait for room
+                await asyncio.sleep(QUEUE_RETRY_DELAY)
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        return name, job.path
+
+    async def stream(self, export: BulkExport) -> AsyncIterator[bytes]:
+        """Yield the ZIP archive in chunks, adding each export as it finishes.
+
+        Files that fail to render, and requested presentations that don't
+        exist, are left out and listed in manifest.json, written as the
+        last entry.
+        """
+        writer = _ChunkWriter()
+        archive = zipfile.ZipFile(writer, mode='w', compression=zipfile.ZIP_STORED)
+        pending = iter(export.presentation_ids)
+        in_flight: Dict[asyncio.Task, int] = {}
+        manifest = [
+            {'presentation_id': presentation_id, 'status': 'failed', 'error': NOT_FOUND}
+            for presentation_id in export.missing_ids
+        ]
+
+        def fill() -> None:
+            while not export.cancelled and len(in_flight) < self.window:
+                presentation_id = next(pending, None)
+                if presentation_id is None:
+                    return
+                task = asyncio.ensure_future(self._render(presentation_id, export.format))
+                in_flight[task] = presentation_id
+                export.running += 1
+
+        try:
+            fill()
+            while in_flight and not export.cancelled:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    presentation_id = in_flight.pop(task)
+                    export.running -= 1
+                    try:
+                        name, path = task.result()
+                        # PDF and PPTX are already compressed, so entries are stored
+                        with open(path, 'rb') as source, archive.open(name, 'w', force_zip64=True) as entry:
+                            while True:
+                                chunk = await anyio.to_thread.run_sync(source.read, COPY_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                entry.write(chunk)
+                                data = writer.drain()
+                                export.bytes_sent += len(data)
+                                yield data
+                    except Exception as e:
+                        export.failures.append({'presentation_id': presentation_id, 'error': str(e)})
+                        manifest.append({'presentation_id': presentation_id, 'status': 'failed', 'error': str(e)})
+                        continue
+                    export.completed += 1
+                    manifest.append({'presentation_id': presentation_id, 'status': 'completed', 'file': name})
+                fill()
+
+            archive.writestr('manifest.json', json.dumps({
+                'format': export.format,
+                'cancelled': export.cancelled,
+                'presentations': manifest
+            }, indent=2))
+            archive.close()
+            data = writer.drain()
+            export.bytes_sent += len(data)
+            yield data
+        finally:
+            # Also reached when the client disconnects mid-stream
+            for task in in_flight:
+                task.cancel()
+            export.running = 0
+            if export.finished_at is None:
+                export.finished_at = time.time()
+
+
+bulk_exports = BulkExportManager(settings.export_bulk_window, settings.export_job_ttl)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import BinaryIO, Callable, Dict, Optional
+from ..config import settings
+
+# Bump when exporter output changes so stale artifacts are not served
+RENDER_VERSION = 2
+
+
+class ExportCache:
+    """Disk-backed cache of rendered export files, keyed by content hash.
+
+    Files are named after the hash of the serialized presentation tree and
+    the format, so an unchanged deck maps to the same file.
+    File mtimes track recency: hits touch the file and eviction removes the
+    least recently used files once the directory grows past max_size.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def cache_key(presentation_data: Dict, export_format: str) -> str:
+        """Stable hash of everything that affects the rendered output"""
+        payload = json.dumps(
+            {
+                'render_version': RENDER_VERSION,
+                'format': export_format,
+                'presentation': presentation_data
+            },
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path_for(self, key: str, export_format: str) -> str:
+        return os.path.join(self.directory, f"{key}.{export_format}")
+
+    def get(self, key: str, export_format: str) -> Optional[str]:
+        """Return the cached file path, marking it as recently used, or None"""
+        path = self.path_for(key, export_format)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, export_format: str, write: Callable[[BinaryIO], None]) -> str:
+        """Have write() render straight into a temp file, then store it atomically.
+
+        Output goes to disk as it is produced rather than through an
+        in-memory buffer, so memory use does not grow with the file size.
+        """
+        path = self.path_for(key, export_format)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used files until the cache fits in max_size"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+export_cache = ExportCache(settings.export_cache_path, settings.export_cache_max_size)
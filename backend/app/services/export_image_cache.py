@@ -0,0 +1,87 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+from PIL import Image
+from ..config import settings
+
+
+class ExportImageCache:
+    """Downsampled copies of images, sized for the box they occupy in an export.
+
+    Camera photos are usually far larger than a 4x3 inch box at print DPI.
+    Each (source content, pixel size, quality) combination is resized and
+    recompressed once and the result is shared by every later export,
+    including those running in other worker processes.
+    """
+
+    def __init__(self, directory: str, dpi: int, quality: int):
+        self.directory = directory
+        self.dpi = dpi
+        self.quality = quality
+        self._source_hashes: Dict[Tuple[str, int, int], str] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def source_hash(self, source_path: str) -> str:
+        """SHA-256 of a file, memoized on its path, size and mtime"""
+        stat = os.stat(source_path)
+        memo_key = (source_path, stat.st_size, stat.st_mtime_ns)
+        digest = self._source_hashes.get(memo_key)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(source_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+            self._source_hashes[memo_key] = digest
+        return digest
+
+    def get(self, source_path: str, box_width: float, box_height: float) -> str:
+        """Path to a JPEG of source_path that fits a box given in inches"""
+        width = max(1, round(box_width * self.dpi))
+        height = max(1, round(box_height * self.dpi))
+        key = f"{self.source_hash(source_path)}_{width}x{height}_q{self.quality}"
+        path = os.path.join(self.directory, f"{key}.jpg")
+        if os.path.exists(path):
+            return path
+
+        with Image.open(source_path) as img:
+            img.draft('RGB', (width, height))
+            img.thumbnail((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            if img.mode in ('RGBA', 'LA', 'P'):
+                # JPEG has no alpha; flatten onto the white slide background
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, 'white')
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    img.save(f, 'JPEG', quality=self.quality, optimize=True)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return path
+
+
+def resolve_image_path(block: Dict) -> Optional[str]:
+    """Local file behind an image block, which stores its /uploads URL as content"""
+    path = block.get('file_path')
+    if not path:
+        url = block.get('content') or ''
+        if not url.startswith('/uploads/'):
+            return None
+        path = os.path.join(settings.upload_path, os.path.basename(url))
+    return path if os.path.isfile(path) else None
+
+
+export_image_cache = ExportImageCache(
+    settings.export_image_cache_path,
+    settings.export_image_dpi,
+    settings.export_image_quality
+)
@@ -0,0 +1,179 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+from ..config import settings
+from .export_cache import export_cache
+from .export_service import ExportService
+
+
+def render_export(presentation_data: Dict, export_format: str, key: str) -> Dict:
+    """Worker process entry point: render into the export cache and report timing"""
+    started_at = time.time()
+    path = export_cache.get(key, export_format)
+    if path is None:
+        path = export_cache.put(
+            key, export_format,
+            lambda output: ExportService.render(presentation_data, export_format, output)
+        )
+    return {'path': path, 'started_at': started_at, 'finished_at': time.time()}
+
+
+class QueueFullError(Exception):
+    """Too many export jobs are queued or running"""
+
+
+class ExportJob:
+    def __init__(self, presentation_id: int, title: str, export_format: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.presentation_id = presentation_id
+        self.title = title
+        self.format = export_format
+        self.key = key
+        self.future: Optional[Future] = None
+        self.cancelled = False
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.cancelled:
+            return 'cancelled'
+        if self.error is not None:
+            return 'failed'
+        if self.path is not None:
+            return 'completed'
+        if self.future is not None and self.future.running():
+            return 'running'
+        return 'queued'
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            self.cancelled = True
+            self.finished_at = time.time()
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self.error = str(e)
+            self.finished_at = time.time()
+            return
+        self.started_at = result['started_at']
+        self.finished_at = result['finished_at']
+        if not self.cancelled:
+            self.path = result['path']
+
+    def to_dict(self) -> Dict:
+        queue_seconds = render_seconds = None
+        if self.started_at is not None:
+            queue_seconds = round(self.started_at - self.submitted_at, 3)
+            if self.finished_at is not None:
+                render_seconds = round(self.finished_at - self.started_at, 3)
+        return {
+            'id': self.id,
+            'presentation_id': self.presentation_id,
+            'format': self.format,
+            'status': self.status,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'queue_seconds': queue_seconds,
+            'render_seconds': render_seconds
+        }
+
+
+class ExportJobManager:
+    """Runs CPU-bound exports in a bounded process pool, off the event loop"""
+
+    def __init__(self, max_workers: int, max_queue_depth: int, job_ttl: int):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.job_ttl = job_ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn avoids forking a process that already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def submit(self, presentation_data: Dict, export_format: str, key: str) -> ExportJob:
+        """Queue an export, raising QueueFullError past max_queue_depth"""
+        with self._lock:
+            self._prune()
+            active = sum(1 for job in self._jobs.values() if job.active)
+            if active >= self.max_queue_depth:
+                raise QueueFullError("Export queue is full")
+
+            job = ExportJob(presentation_data['id'], presentation_data['title'], export_format, key)
+            job.future = self.executor.submit(render_export, presentation_data, export_format, key)
+            self._jobs[job.id] = job
+        job.future.add_done_callback(job._on_done)
+        return job
+
+    async def run(self, presentation_data: Dict, export_format: str, key: str) -> ExportJob:
+        """Submit an export and wait for it without blocking the event loop"""
+        job = self.submit(presentation_data, export_format, key)
+        try:
+            await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            self.cancel(job.id)
+            raise
+        except Exception:
+            pass
+        # Done callbacks run on the executor's thread; make sure ours has
+        # populated the job before reporting on it.
+        job._on_done(job.future)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ExportJob]:
+        """Cancel a job. Queued jobs never start; running ones finish but are discarded."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.active:
+            if job.future is not None:
+                job.future.cancel()
+            job.cancelled = True
+        return job
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if not job.active and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+export_jobs = ExportJobManager(
+    settings.export_workers,
+    settings.export_max_queue_depth,
+    settings.export_job_ttl
+)
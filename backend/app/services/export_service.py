@@ -1,6 +1,6 @@
 import io
 import os
-from typing import Dict, List
+from typing import BinaryIO, Dict, List
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -8,14 +8,43 @@ from reportlab.lib.units import inch
 from pptx import Presentation as PPTXPresentation
 from pptx.util import Inches
 from PIL import Image as PILImage
+from .export_image_cache import export_image_cache, resolve_image_path
+
+EXPORT_MEDIA_TYPES = {
+    'pdf': 'application/pdf',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+}
 
 
 class ExportService:
+    @staticmethod
+    def render(presentation_data: Dict, export_format: str, output: BinaryIO) -> None:
+        """Render a presentation in one of EXPORT_MEDIA_TYPES into a binary file"""
+        if export_format == 'pdf':
+            ExportService.write_pdf(presentation_data, output)
+        elif export_format == 'pptx':
+            ExportService.write_pptx(presentation_data, output)
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
     @staticmethod
     def export_to_pdf(presentation_data: Dict) -> bytes:
         """Export presentation to PDF"""
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        ExportService.write_pdf(presentation_data, buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def export_to_pptx(presentation_data: Dict) -> bytes:
+        """Export presentation to PowerPoint"""
+        buffer = io.BytesIO()
+        ExportService.write_pptx(presentation_data, buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def write_pdf(presentation_data: Dict, output: BinaryIO) -> None:
+        """Write presentation as PDF to a binary file"""
+        doc = SimpleDocTemplate(output, pagesize=A4)
         styles = getSampleStyleSheet()
         story = []
 
@@ -43,9 +72,11 @@ class ExportService:
             for block in slide.get('content_blocks', []):
                 if block['type'] == 'text':
                     story.append(Paragraph(block['content'], styles['Normal']))
-                elif block['type'] == 'image' and block.get('file_path'):
+                elif block['type'] == 'image' and resolve_image_path(block):
                     try:
-                        img = Image(block['file_path'], width=4 * inch, height=3 * inch)
+                        # Downsampled once per image and box size, then reused
+                        image_path = export_image_cache.get(resolve_image_path(block), 4, 3)
+                        img = Image(image_path, width=4 * inch, height=3 * inch)
                         story.append(img)
                     except:
                         story.append(Paragraph(f"[Image: {block.get('content', 'Image')}]", styles['Italic']))
@@ -55,12 +86,10 @@ class ExportService:
             story.append(Spacer(1, 0.3 * inch))
 
         doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
 
     @staticmethod
-    def export_to_pptx(presentation_data: Dict) -> bytes:
-        """Export presentation to PowerPoint"""
+    def write_pptx(presentation_data: Dict, output: BinaryIO) -> None:
+        """Write presentation as PowerPoint to a binary file"""
         prs = PPTXPresentation()
 
         # Title slide
@@ -94,17 +123,15 @@ class ExportService:
                     text_frame.text = block['content']
                     content_top += height + Inches(0.2)
 
-                elif block['type'] == 'image' and block.get('file_path'):
+                elif block['type'] == 'image' and resolve_image_path(block):
                     try:
                         left = Inches(2)
                         width = Inches(6)
                         height = Inches(4)
-                        slide.shapes.add_picture(block['file_path'], left, content_top, width, height)
+                        image_path = export_image_cache.get(resolve_image_path(block), 6, 4)
+                        slide.shapes.add_picture(image_path, left, content_top, width, height)
                         content_top += height + Inches(0.2)
                     except:
                         pass
 
-        buffer = io.BytesIO()
-        prs.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        prs.save(output)
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from PIL import Image
+from ..config import settings
+
+# Pillow format name -> file extension
+DERIVATIVE_FORMATS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def derivative_executor() -> ProcessPoolExecutor:
+    """Process pool that image derivatives are rendered in"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.media_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def shutdown_derivative_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_derivatives(source_path: str, name: str, widths: Dict[str, int],
+                       quality: int, output_dir: str) -> List[Dict]:
+    """Worker entry point: write every variant/format of an image and describe them.
+
+    The source is decoded once, at the smallest size that still covers the
+    largest variant (JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale), and
+    each smaller variant is resized from the previous one.
+    """
+    results = []
+    with Image.open(source_path) as img:
+        largest = max(widths.values())
+        if img.width > largest:
+            img.draft('RGB', (largest, largest * img.height // img.width))
+        img.load()
+
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        current = img.convert('RGBA' if has_alpha else 'RGB')
+
+        for variant, width in sorted(widths.items(), key=lambda item: item[1], reverse=True):
+            if current.width > width:
+                height = max(1, round(current.height * width / current.width))
+                # reducing_gap lets Pillow reduce() by an integer factor before
+                # the final LANCZOS pass, which is much cheaper on big images
+                current = current.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+            for image_format, extension in DERIVATIVE_FORMATS.items():
+                filename = f"{name}_{variant}.{extension}"
+                file_path = os.path.join(output_dir, filename)
+                output = current.convert('RGB') if image_format == 'jpeg' else current
+                output.save(file_path, image_format.upper(), quality=quality, optimize=True)
+                results.append({
+                    'variant': variant,
+                    'format': image_format,
+                    'filename': filename,
+                    'file_path': file_path,
+                    'file_size': os.path.getsize(file_path),
+                    'width': current.width,
+                    'height': current.height
+                })
+    return results
@@ -1,64 +1,378 @@
+import asyncio
+import hashlib
 import os
+import tempfile
 import uuid
 import aiofiles
+from fastapi import UploadFile
 from PIL import Image
-from typing import Optional, Tuple, Dict
+from sqlalchemy import update, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple, Dict, List
 from ..config import settings
+from ..database import SessionLocal
+from ..models import Media, MediaBlob, MediaDerivative
+from .image_derivatives import derivative_executor, render_derivatives
+from ..utils.helpers import keyset_page
+
+
+# Attempts to take a blob reference while another request creates or deletes it
+BLOB_CLAIM_ATTEMPTS = 5
+BLOB_CLAIM_RETRY_DELAY = 0.05  # Seconds, multiplied by the attempt number
+
+
+class UploadTooLargeError(Exception):
+    """The upload exceeded the configured maximum size"""
+
+
+class BlobContentionError(Exception):
+    """Another request is creating or deleting the blob for this content"""
 
 
 class MediaService:
     @staticmethod
-    async def save_uploaded_file(file_content: bytes, filename: str, mime_type: str) -> Dict:
-        """Save uploaded file and return metadata"""
-        # Generate unique filename
-        file_extension = os.path.splitext(filename)[1].lower()
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(settings.upload_path, unique_filename)
+    async def stream_to_temp_file(file: UploadFile, max_size: int, write: bool = True) -> Tuple[Optional[str], int, str]:
+        """Copy an upload to a temp file in fixed-size chunks.
+
+        Returns (temp_path, size, sha256 hex digest). Raises
+        UploadTooLargeError as soon as more than max_size bytes have been read.
+        With write=False the upload is only measured and hashed and temp_path
+        is None.
+        """
+        temp_path = None
+        if write:
+            # Outside the served directory, but on its filesystem so the later
+            # rename is atomic
+            fd, temp_path = tempfile.mkstemp(dir=settings.upload_temp_path, suffix='.part')
+            os.close(fd)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            out = await aiofiles.open(temp_path, 'wb') if write else None
+            try:
+                while True:
+                    chunk = await file.read(settings.upload_chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_size:
+                        raise UploadTooLargeError(f"File exceeds {max_size} bytes")
+                    digest.update(chunk)
+                    if out is not None:
+                        await out.write(chunk)
+            finally:
+                if out is not None:
+                    await out.close()
+        except BaseException:
+            if temp_path is not None:
+                os.remove(temp_path)
+            raise
+        return temp_path, size, digest.hexdigest()
+
+    @staticmethod
+    async def create_media(db: AsyncSession, file: UploadFile, expected_sha256: Optional[str] = None) -> Tuple[Media, bool]:
+        """Store an upload by content hash and create its Media row.
+
+        Returns (media, stored) where stored is False when the content was
+        already present and the upload was deduplicated. If the client sends
+        the expected hash of a file we already have, the upload is only
+        hashed to verify it, and written to disk only if that blob turns out
+        to be mid-delete.
+        """
+        mime_type = file.content_type or 'application/octet-stream'
+        temp_path = None
+        blob = None
+        if expected_sha256:
+            blob = await db.scalar(select(MediaBlob).where(MediaBlob.sha256 == expected_sha256.lower()))
+        if blob is not None:
+            _, file_size, sha256 = await MediaService.stream_to_temp_file(
+                file, settings.max_file_size, write=False
+            )
+            if sha256 != blob.sha256:
+                # The client's hash was wrong; store the upload normally
+                blob = None
+                await file.seek(0)
+        if blob is None:
+            temp_path, file_size, sha256 = await MediaService.stream_to_temp_file(
+                file, settings.max_file_size
+            )
+
+        try:
+            for attempt in range(BLOB_CLAIM_ATTEMPTS):
+                try:
+                    return await db.run_sync(
+                        MediaService._store_media, sha256, temp_path, file, mime_type, file_size
+                    )
+                except BlobContentionError:
+                    if attempt == BLOB_CLAIM_ATTEMPTS - 1:
+                        raise
+                    if temp_path is None:
+                        # The blob we only verified against is being deleted;
+                        # the retry may have to store the content itself
+                        await file.seek(0)
+                        temp_path, file_size, sha256 = await MediaService.stream_to_temp_file(
+                            file, settings.max_file_size
+                        )
+                    await asyncio.sleep(BLOB_CLAIM_RETRY_DELAY * attempt)
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _store_media(db: Session, sha256: str, temp_path: Optional[str], file: UploadFile,
+                     mime_type: str, file_size: int) -> Tuple[Media, bool]:
+        blob, stored = MediaService._acquire_blob(db, sha256, temp_path, file, mime_type, file_size)
+        media = Media(
+            filename=blob.filename,
+            original_filename=file.filename,
+            file_path=blob.file_path,
+            file_size=blob.file_size,
+            mime_type=blob.mime_type,
+            width=blob.width,
+            height=blob.height,
+            blob_id=blob.id
+        )
+        media.blob = blob
+        db.add(media)
+        db.commit()
+        return media, stored
+
+    @staticmethod
+    def get_media(db: Session, media_id: int) -> Optional[Media]:
+        return db.query(Media).filter(Media.id == media_id).first()
+
+    @staticmethod
+    def list_derivatives(db: Session, media_id: int) -> Optional[List[Dict]]:
+        """Resized variants of a media item, or None if the media doesn't exist"""
+        media = MediaService.get_media(db, media_id)
+        if not media:
+            return None
+
+        derivatives = media.blob.derivatives if media.blob else []
+        return [
+            {
+                "variant": d.variant,
+                "format": d.format,
+                "file_path": f"/uploads/{d.filename}",
+                "file_size": d.file_size,
+                "width": d.width,
+                "height": d.height
+            }
+            for d in sorted(derivatives, key=lambda d: (d.format, d.width))
+        ]
+
+    @staticmethod
+    def _acquire_blob(db: Session, sha256: str, temp_path: Optional[str], file: UploadFile,
+                      mime_type: str, file_size: int) -> Tuple[MediaBlob, bool]:
+        """Take a reference on the blob for sha256, creating it from temp_path if needed.
 
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_content)
+        Raises BlobContentionError when a concurrent upload or delete of the
+        same content got there first; the caller retries after a short wait.
+        """
+        blob = db.query(MediaBlob).filter(MediaBlob.sha256 == sha256).first()
+        if blob is not None:
+            claimed = db.execute(
+                update(MediaBlob)
+                .where(MediaBlob.id == blob.id, MediaBlob.ref_count > 0)
+                .values(ref_count=MediaBlob.ref_count + 1)
+            )
+            if claimed.rowcount:
+                db.refresh(blob)
+                return blob, False
+            # The last reference is being deleted concurrently
+            db.rollback()
+            raise BlobContentionError(sha256)
+
+        if temp_path is None:
+            raise ValueError("Upload content is no longer available")
+
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        filename = f"{sha256}{file_extension}"
+        file_path = os.path.join(settings.upload_path, filename)
 
         # Get image dimensions if it's an image
         width, height = None, None
         if mime_type.startswith('image/'):
             try:
-                with Image.open(file_path) as img:
+                with Image.open(temp_path) as img:
                     width, height = img.size
             except:
                 pass
 
-        return {
-            'filename': unique_filename,
-            'original_filename': filename,
-            'file_path': file_path,
-            'file_size': len(file_content),
-            'mime_type': mime_type,
-            'width': width,
-            'height': height
-        }
+        blob = MediaBlob(
+            sha256=sha256,
+            filename=filename,
+            file_path=file_path,
+            file_size=file_size,
+            mime_type=mime_type,
+            width=width,
+            height=height,
+            ref_count=1
+        )
+        db.add(blob)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Someone stored the same content first; share theirs
+            db.rollback()
+            raise BlobContentionError(sha256)
+        # Only once the row is ours: a delete of an earlier blob for this
+        # content has committed by now and moved its file out of the way
+        os.replace(temp_path, file_path)
+        return blob, True
 
     @staticmethod
-    def optimize_image(file_path: str, max_width: int = 1920, quality: int = 85) -> str:
-        """Optimize image for web use"""
+    def delete_media(db: Session, media: Media) -> None:
+        """Delete a Media row, removing the stored file once nothing references it"""
+        blob_id = media.blob_id
+        orphaned_paths = []
+        db.delete(media)
+
+        if blob_id is None:
+            # Stored before deduplication; the file belongs to this row alone
+            orphaned_paths.append(media.file_path)
+        else:
+            db.execute(
+                update(MediaBlob)
+                .where(MediaBlob.id == blob_id)
+                .values(ref_count=MediaBlob.ref_count - 1)
+            )
+            # The decrement above holds the blob's row lock, so a concurrent
+            # upload cannot take a new reference between these statements.
+            unreferenced = select(MediaBlob.id).where(MediaBlob.id == blob_id, MediaBlob.ref_count <= 0)
+            blob_path = db.scalar(select(MediaBlob.file_path).where(MediaBlob.id.in_(unreferenced)))
+            if blob_path is not None:
+                orphaned_paths.append(blob_path)
+                orphaned_paths.extend(db.scalars(
+                    select(MediaDerivative.file_path).where(MediaDerivative.blob_id == blob_id)
+                ))
+                db.execute(delete(MediaDerivative).where(MediaDerivative.blob_id == blob_id))
+                db.execute(delete(MediaBlob).where(MediaBlob.id == blob_id))
+
+        # Move the files aside while the blob row is still locked. An upload
+        # of the same content blocks on that lock until we commit and only
+        # then puts its file at the shared path, so it can't be unlinked here.
+        moved = MediaService._move_aside(orphaned_paths)
         try:
-            with Image.open(file_path) as img:
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-
-                # Resize if too large
-                if img.width > max_width:
-                    ratio = max_width / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-
-                # Save optimized version
-                optimized_path = file_path.replace('.', '_optimized.')
-                img.save(optimized_path, 'JPEG', quality=quality, optimize=True)
-                return optimized_path
+            db.commit()
+        except BaseException:
+            for original, aside in moved:
+                os.replace(aside, original)
+            raise
+
+        MediaService._remove_files(aside for _, aside in moved)
+
+    @staticmethod
+    def generate_derivatives(blob_id: int) -> None:
+        """Render and record the responsive variants of an image blob.
+
+        Meant to run as a background task after the upload response is sent.
+        Being a plain function it runs in the threadpool, off the event loop;
+        the resizing itself happens in the derivative process pool.
+        """
+        db = SessionLocal()
+        try:
+            blob = db.query(MediaBlob).filter(MediaBlob.id == blob_id).first()
+            if blob is None:
+                return
+            source_path, sha256 = blob.file_path, blob.sha256
+            # Don't hold a transaction open while rendering
+            db.rollback()
+
+            results = derivative_executor().submit(
+                render_derivatives,
+                source_path,
+                sha256,
+                settings.media_derivative_widths,
+                settings.media_derivative_quality,
+                settings.upload_path
+            ).result()
+
+            # Lock the blob row so a concurrent delete either runs first and
+            # is seen here, or waits and then removes these derivatives too
+            claimed = db.execute(
+                update(MediaBlob)
+                .where(MediaBlob.id == blob_id)
+                .values(ref_count=MediaBlob.ref_count)
+            )
+            if claimed.rowcount == 0:
+                # The blob was deleted while we were rendering
+                db.rollback()
+                MediaService._remove_files(result['file_path'] for result in results)
+                return
+            db.execute(delete(MediaDerivative).where(MediaDerivative.blob_id == blob_id))
+            db.execute(insert(MediaDerivative), [dict(result, blob_id=blob_id) for result in results])
+            db.commit()
         except Exception as e:
-            print(f"Image optimization failed: {e}")
-            return file_path
+            print(f"Derivative generation failed for blob {blob_id}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def pick_derivative(db: Session, media: Media, width: int, image_format: str) -> Optional[MediaDerivative]:
+        """Smallest derivative of the given format at least width wide, else the largest one"""
+        if media.blob_id is None:
+            return None
+        derivatives = (
+            db.query(MediaDerivative)
+            .filter(MediaDerivative.blob_id == media.blob_id, MediaDerivative.format == image_format)
+            .order_by(MediaDerivative.width)
+            .all()
+        )
+        for derivative in derivatives:
+            if derivative.width >= width:
+                return derivative
+        return derivatives[-1] if derivatives else None
+
+    @staticmethod
+    def _move_aside(paths) -> List[Tuple[str, str]]:
+        """Rename files into the unserved temp directory; returns (original, new) pairs"""
+        moved = []
+        for path in paths:
+            aside = os.path.join(settings.upload_temp_path, f"{uuid.uuid4().hex}.deleted")
+            try:
+                os.replace(path, aside)
+            except OSError:
+                continue
+            moved.append((path, aside))
+        return moved
 
-        return file_path
\ No newline at end of file
+    @staticmethod
+    def _remove_files(paths) -> None:
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def list_media(db: Session, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """List uploaded media newest first, a page at a time"""
+        query = db.query(
+            Media.id,
+            Media.filename,
+            Media.original_filename,
+            Media.file_size,
+            Media.mime_type,
+            Media.width,
+            Media.height,
+            Media.uploaded_at
+        )
+        rows, next_cursor = keyset_page(db, query, Media.uploaded_at, Media.id, limit, cursor)
+        return [
+            {
+                "id": m.id,
+                "filename": m.filename,
+                "original_filename": m.original_filename,
+                "file_path": f"/uploads/{m.filename}",
+                "file_size": m.file_size,
+                "mime_type": m.mime_type,
+                "width": m.width,
+                "height": m.height,
+                "uploaded_at": m.uploaded_at
+            }
+            for m in rows
+        ], next_cursor
@@ -1,7 +1,54 @@
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+import uuid
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, update, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import AsyncIterator, List, Dict, Iterator, Optional, Tuple
 from ..models import Presentation, Slide, ContentBlock
 from ..database import get_db
+from ..utils.helpers import keyset_page
+from .tree_cache import CachedTree, tree_cache
+
+# Fields a patch operation may write, mapped from API name to column name
+SLIDE_FIELDS = {
+    'title': 'title',
+    'layout': 'layout',
+    'background': 'background',
+    'animations': 'animations'
+}
+BLOCK_FIELDS = {
+    'type': 'type',
+    'content': 'content',
+    'metadata': 'block_metadata',
+    'position_x': 'position_x',
+    'position_y': 'position_y',
+    'width': 'width',
+    'height': 'height',
+    'z_index': 'z_index',
+    'styles': 'styles'
+}
+BLOCK_MOVE_FIELDS = ('position_x', 'position_y', 'width', 'height', 'z_index')
+
+# Slide order_index and block z_index are sparse keys ORDER_GAP apart, so an
+# insert or move writes only the moved row: it takes the midpoint of its new
+# neighbours' keys. When that would leave less than REBALANCE_GAP to either
+# neighbour, the scope is renumbered first, in the same transaction. Keys stay
+# positive since z_index doubles as the CSS z-index.
+ORDER_GAP = 1024
+REBALANCE_GAP = 16
+
+
+class VersionConflictError(Exception):
+    """The presentation was modified since the version the client based its changes on"""
+
+    def __init__(self, current_version: int, presentation_id: Optional[int] = None):
+        super().__init__(f"Presentation is at version {current_version}")
+        self.current_version = current_version
+        self.presentation_id = presentation_id
+
+
+class InvalidOperationError(ValueError):
+    """A patch operation is malformed or references something outside the presentation"""
 
 
 class PresentationService:
@@ -13,88 +60,797 @@ class PresentationService:
             title=presentation_data['title'],
             description=presentation_data.get('description', ''),
             theme=presentation_data.get('theme', 'default'),
-            settings=presentation_data.get('settings', {})
+            settings=presentation_data.get('settings', {}),
+            is_template=presentation_data.get('is_template') or False
         )
         db.add(presentation)
         db.flush()  # Get the ID
 
-        # Create slides
-        for i, slide_data in enumerate(presentation_data.get('slides', [])):
-            slide = Slide(
-                presentation_id=presentation.id,
-                order_index=i,
-                title=slide_data.get('title', ''),
-                layout=slide_data.get('layout', 'default'),
-                background=slide_data.get('background', {}),
-                animations=slide_data.get('animations', {})
-            )
-            db.add(slide)
-            db.flush()  # Get the slide ID
-
-            # Create content blocks
-            for j, block_data in enumerate(slide_data.get('content_blocks', [])):
-                content_block = ContentBlock(
-                    slide_id=slide.id,
-                    type=block_data['type'],
-                    content=block_data.get('content', ''),
-                    block_metadata=block_data.get('metadata', {}),  # Updated field name
-                    position_x=block_data.get('position_x', 0),
-                    position_y=block_data.get('position_y', j * 100),
-                    width=block_data.get('width', 100),
-                    height=block_data.get('height', 50),
-                    z_index=block_data.get('z_index', j),
-                    styles=block_data.get('styles', {})
-                )
-                db.add(content_block)
+        slides_data = presentation_data.get('slides') or []
+        if slides_data:
+            slide_ids = PresentationService._bulk_insert_slides(db, presentation.id, slides_data)
+            PresentationService._bulk_insert_blocks(db, slide_ids, slides_data)
 
         db.commit()
         db.refresh(presentation)
         return presentation
 
+    @staticmethod
+    def clone_presentation(db: Session, source_id: int, title: Optional[str] = None,
+                           description: Optional[str] = None, is_template: bool = False) -> Optional[int]:
+        """Copy a presentation with its slides and blocks, returning the new ID.
+
+        Runs three INSERT ... SELECT statements whatever the deck size; no
+        rows are loaded into Python. Returns None if the source doesn't exist.
+        """
+        new_id = db.scalar(
+            insert(Presentation)
+            .from_select(
+                ['title', 'description', 'theme', 'settings', 'is_template', 'version', 'uid'],
+                select(
+                    func.coalesce(literal(title, Presentation.title.type), Presentation.title),
+                    func.coalesce(literal(description, Presentation.description.type), Presentation.description),
+                    Presentation.theme,
+                    Presentation.settings,
+                    literal(is_template, Presentation.is_template.type),
+                    literal(1, Presentation.version.type),
+                    literal(uuid.uuid4().hex, Presentation.uid.type)
+                ).where(Presentation.id == source_id)
+            )
+            .returning(Presentation.id)
+        )
+        if new_id is None:
+            db.rollback()
+            return None
+
+        slide_columns = ['order_index', 'title', 'layout', 'background', 'animations']
+        db.execute(
+            insert(Slide).from_select(
+                ['presentation_id'] + slide_columns,
+                select(literal(new_id, Slide.presentation_id.type), *(getattr(Slide, c) for c in slide_columns))
+                .where(Slide.presentation_id == source_id)
+                .order_by(Slide.order_index, Slide.id)
+            )
+        )
+
+        # Pair each source slide with its copy by position; the copies were
+        # inserted in (order_index, id) order, so ties map one-to-one too.
+        def positions(presentation_id):
+            return (
+                select(
+                    Slide.id,
+                    func.row_number().over(order_by=(Slide.order_index, Slide.id)).label('position')
+                )
+                .where(Slide.presentation_id == presentation_id)
+                .subquery()
+            )
+        source, copy = positions(source_id), positions(new_id)
+        block_columns = [
+            'type', 'content', 'block_metadata', 'position_x', 'position_y',
+            'width', 'height', 'z_index', 'styles'
+        ]
+        db.execute(
+            insert(ContentBlock).from_select(
+                ['slide_id'] + block_columns,
+                select(copy.c.id, *(getattr(ContentBlock, c) for c in block_columns))
+                .join(source, source.c.id == ContentBlock.slide_id)
+                .join(copy, copy.c.position == source.c.position)
+                .order_by(ContentBlock.id)
+            )
+        )
+        db.commit()
+        return new_id
+
+    @staticmethod
+    def _bulk_insert_slides(db: Session, presentation_id: int, slides_data: List[Dict]) -> List[int]:
+        """Insert all slides in batched multi-row statements and return their IDs in input order"""
+        rows = [
+            PresentationService._slide_row(presentation_id, (i + 1) * ORDER_GAP, slide_data)
+            for i, slide_data in enumerate(slides_data)
+        ]
+
+        # SQLite cannot guarantee the row order of a multi-row RETURNING, so
+        # SQLAlchemy would fall back to one INSERT per row there; a plain
+        # executemany plus one SELECT is far cheaper on that dialect.
+        dialect = db.get_bind().dialect
+        if dialect.name != 'sqlite' and dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = db.execute(
+                insert(Slide).returning(Slide.id, sort_by_parameter_order=True),
+                rows
+            )
+            return list(result.scalars())
+
+        # Insert, then read the IDs back in one query
+        db.execute(insert(Slide), rows)
+        return list(db.scalars(
+            select(Slide.id)
+            .where(Slide.presentation_id == presentation_id)
+            .order_by(Slide.order_index)
+        ))
+
+    @staticmethod
+    def _bulk_insert_blocks(db: Session, slide_ids: List[int], slides_data: List[Dict]) -> None:
+        """Insert the content blocks of every slide in batched multi-row statements"""
+        rows = [
+            PresentationService._block_row(slide_id, j, block_data)
+            for slide_id, slide_data in zip(slide_ids, slides_data)
+            for j, block_data in enumerate(slide_data.get('content_blocks', []))
+        ]
+        if rows:
+            db.execute(insert(ContentBlock), rows)
+
+    @staticmethod
+    def _slide_row(presentation_id: int, order_index: int, slide_data: Dict) -> Dict:
+        """Column values for a new slide"""
+        return {
+            'presentation_id': presentation_id,
+            'order_index': order_index,
+            'title': slide_data.get('title', ''),
+            'layout': slide_data.get('layout', 'default'),
+            'background': slide_data.get('background', {}),
+            'animations': slide_data.get('animations', {})
+        }
+
+    @staticmethod
+    def _block_row(slide_id: int, position: int, block_data: Dict) -> Dict:
+        """Column values for a new content block, defaulting to stacked layout by position"""
+        return {
+            'slide_id': slide_id,
+            'type': block_data['type'],
+            'content': block_data.get('content', ''),
+            'block_metadata': block_data.get('metadata', {}),  # Updated field name
+            'position_x': block_data.get('position_x', 0),
+            'position_y': block_data.get('position_y', position * 100),
+            'width': block_data.get('width', 100),
+            'height': block_data.get('height', 50),
+            'z_index': block_data.get('z_index', (position + 1) * ORDER_GAP),
+            'styles': block_data.get('styles', {})
+        }
+
+    @staticmethod
+    def list_presentations(db: Session, limit: int = 50, cursor: Optional[str] = None,
+                           sort: str = 'updated_at', descending: bool = True,
+                           is_template: Optional[bool] = None) -> Tuple[List[Dict], Optional[str]]:
+        """List presentation summaries a page at a time, without loading slides"""
+        slide_count = (
+            select(func.count(Slide.id))
+            .where(Slide.presentation_id == Presentation.id)
+            .correlate(Presentation)
+            .scalar_subquery()
+        )
+        # Plain columns so the (timestamp, id) indexes serve the sort
+        sort_column = Presentation.created_at if sort == 'created_at' else Presentation.updated_at
+
+        query = db.query(
+            Presentation.id,
+            Presentation.title,
+            Presentation.description,
+            Presentation.theme,
+            Presentation.is_template,
+            Presentation.created_at,
+            Presentation.updated_at,
+            slide_count.label('slide_count')
+        )
+        if is_template is not None:
+            query = query.filter(Presentation.is_template == is_template)
+        rows, next_cursor = keyset_page(
+            db, query, sort_column, Presentation.id, limit, cursor, descending
+        )
+        return [
+            {
+                'id': row.id,
+                'title': row.title,
+                'description': row.description,
+                'theme': row.theme,
+                'is_template': row.is_template,
+                'created_at': row.created_at,
+                'updated_at': row.updated_at,
+                'slide_count': row.slide_count
+            }
+            for row in rows
+        ], next_cursor
+
+    @staticmethod
+    def select_presentation_ids(db: Session, presentation_ids: Optional[List[int]] = None,
+                                is_template: Optional[bool] = None,
+                                updated_since: Optional[datetime] = None,
+                                limit: Optional[int] = None) -> List[int]:
+        """IDs of the existing presentations matching every given filter, in ID order"""
+        query = select(Presentation.id).order_by(Presentation.id)
+        if presentation_ids is not None:
+            query = query.where(Presentation.id.in_(presentation_ids))
+        if is_template is not None:
+            query = query.where(Presentation.is_template == is_template)
+        if updated_since is not None:
+            query = query.where(Presentation.updated_at >= updated_since)
+        if limit is not None:
+            query = query.limit(limit)
+        return list(db.scalars(query))
+
+    @staticmethod
+    def missing_presentation_ids(db: Session, presentation_ids: List[int]) -> List[int]:
+        """The given IDs that no presentation has, in ID order"""
+        existing = set(db.scalars(select(Presentation.id).where(Presentation.id.in_(presentation_ids))))
+        return sorted(set(presentation_ids) - existing)
+
+    @staticmethod
+    def update_presentation(db: Session, presentation_id: int, update_data: Dict) -> bool:
+        """Update top-level presentation fields and bump its version"""
+        presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+        if not presentation:
+            return False
+
+        for field, value in update_data.items():
+            setattr(presentation, field, value)
+        presentation.version = Presentation.version + 1
+
+        db.commit()
+        tree_cache.invalidate(presentation_id)
+        return True
+
+    @staticmethod
+    def delete_presentation(db: Session, presentation_id: int) -> bool:
+        """Delete a presentation with its slides and content blocks"""
+        presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+        if not presentation:
+            return False
+
+        db.delete(presentation)
+        db.commit()
+        tree_cache.invalidate(presentation_id)
+        return True
+
+    @staticmethod
+    def list_text_blocks(db: Session, presentation_id: int) -> Optional[List[Dict]]:
+        """Non-empty text blocks of a presentation in slide order, or None if it doesn't exist"""
+        if db.scalar(select(Presentation.id).where(Presentation.id == presentation_id)) is None:
+            return None
+        rows = db.execute(
+            select(ContentBlock.id, ContentBlock.content)
+            .join(Slide, Slide.id == ContentBlock.slide_id)
+            .where(Slide.presentation_id == presentation_id,
+                   ContentBlock.type == 'text',
+                   ContentBlock.content.is_not(None),
+                   ContentBlock.content != '')
+            .order_by(Slide.order_index, Slide.id, ContentBlock.z_index, ContentBlock.id)
+        ).all()
+        return [{'id': row.id, 'content': row.content} for row in rows]
+
+    @staticmethod
+    def block_versions(db: Session, block_ids: List[int]) -> Dict[int, int]:
+        """{presentation_id: version} for the presentations owning these blocks"""
+        if not block_ids:
+            return {}
+        return dict(db.execute(
+            select(Presentation.id, Presentation.version)
+            .where(Presentation.id.in_(
+                select(Slide.presentation_id)
+                .join(ContentBlock, ContentBlock.slide_id == Slide.id)
+                .where(ContentBlock.id.in_(block_ids))
+            ))
+        ).all())
+
+    @staticmethod
+    def update_block_contents(db: Session, contents: Dict[int, str],
+                              base_versions: Dict[int, int]) -> Dict[int, int]:
+        """Set the content of many blocks in one executemany UPDATE.
+
+        base_versions maps each owning presentation to the version the new
+        contents were derived from; if any presentation has moved on since,
+        nothing is written and VersionConflictError is raised. Unknown
+        block IDs are ignored. Returns {presentation_id: new_version}.
+        """
+        if not contents:
+            return {}
+        owners = db.execute(
+            select(ContentBlock.id, Slide.presentation_id)
+            .join(Slide, Slide.id == ContentBlock.slide_id)
+            .where(ContentBlock.id.in_(list(contents)))
+        ).all()
+        if not owners:
+            return {}
+
+        versions = {}
+        for presentation_id in sorted({row.presentation_id for row in owners}):
+            base_version = base_versions.get(presentation_id)
+            # Claim the version first, as apply_operations does
+            claimed = db.execute(
+                update(Presentation)
+                .where(Presentation.id == presentation_id, Presentation.version == base_version)
+                .values(version=Presentation.version + 1, updated_at=func.now())
+            )
+            if claimed.rowcount == 0:
+                current_version = db.scalar(
+                    select(Presentation.version).where(Presentation.id == presentation_id)
+                )
+                db.rollback()
+                raise VersionConflictError(current_version, presentation_id)
+            versions[presentation_id] = base_version + 1
+
+        db.execute(update(ContentBlock), [{'id': row.id, 'content': contents[row.id]} for row in owners])
+        db.commit()
+        for presentation_id in versions:
+            tree_cache.invalidate(presentation_id)
+        return versions
+
+    @staticmethod
+    def apply_operations(db: Session, presentation_id: int, base_version: int,
+                         operations: List[Dict], base_uid: Optional[str] = None
+                         ) -> Optional[Tuple[str, int, List[Dict]]]:
+        """Apply a batch of slide/block operations in one transaction.
+
+        The batch only applies if the presentation is still at base_version,
+        and, when base_uid is given, is still the row that uid was issued
+        for; returns (uid, new_version, per-operation results), or None if
+        the presentation does not exist.
+        """
+        base = [Presentation.id == presentation_id, Presentation.version == base_version]
+        if base_uid is not None:
+            base.append(Presentation.uid == base_uid)
+        # Claiming the version first also takes the row lock, so concurrent
+        # batches for the same presentation serialize here.
+        uid = db.scalar(
+            update(Presentation)
+            .where(*base)
+            .values(version=Presentation.version + 1, updated_at=func.now())
+            .returning(Presentation.uid)
+        )
+        if uid is None:
+            current_version = db.scalar(
+                select(Presentation.version).where(Presentation.id == presentation_id)
+            )
+            db.rollback()
+            if current_version is None:
+                return None
+            raise VersionConflictError(current_version)
+
+        handlers = {
+            'add_slide': PresentationService._op_add_slide,
+            'update_slide': PresentationService._op_update_slide,
+            'move_slide': PresentationService._op_move_slide,
+            'delete_slide': PresentationService._op_delete_slide,
+            'add_block': PresentationService._op_add_block,
+            'update_block': PresentationService._op_update_block,
+            'move_block': PresentationService._op_move_block,
+            'delete_block': PresentationService._op_delete_block
+        }
+        results = []
+        try:
+            for operation in operations:
+                handler = handlers.get(operation.get('op'))
+                if handler is None:
+                    raise InvalidOperationError(f"Unknown operation: {operation.get('op')}")
+                results.append(handler(db, presentation_id, operation))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        tree_cache.invalidate(presentation_id)
+
+        return uid, base_version + 1, results
+
+    @staticmethod
+    def _require(operation: Dict, key: str):
+        """Fetch a required key from the operation or its data payload"""
+        value = operation.get(key)
+        if value is None:
+            value = (operation.get('data') or {}).get(key)
+        if value is None:
+            raise InvalidOperationError(f"{operation['op']} requires {key}")
+        return value
+
+    @staticmethod
+    def _pick(data: Dict, fields: Dict) -> Dict:
+        """Map the writable API fields present in data to column values"""
+        return {column: data[name] for name, column in fields.items() if name in data}
+
+    @staticmethod
+    def _check_rowcount(result, kind: str, object_id: int) -> None:
+        if result.rowcount == 0:
+            raise InvalidOperationError(f"{kind} {object_id} not found in this presentation")
+
+    @staticmethod
+    def _check_slide(db: Session, presentation_id: int, slide_id: int) -> None:
+        found = db.scalar(
+            select(Slide.id).where(Slide.id == slide_id, Slide.presentation_id == presentation_id)
+        )
+        if found is None:
+            raise InvalidOperationError(f"Slide {slide_id} not found in this presentation")
+
+    @staticmethod
+    def _block_slide(db: Session, presentation_id: int, block_id: int) -> int:
+        slide_id = db.scalar(
+            select(ContentBlock.slide_id)
+            .where(ContentBlock.id == block_id,
+                   ContentBlock.slide_id.in_(PresentationService._presentation_slides(presentation_id)))
+        )
+        if slide_id is None:
+            raise InvalidOperationError(f"Block {block_id} not found in this presentation")
+        return slide_id
+
+    @staticmethod
+    def _presentation_slides(presentation_id: int):
+        return select(Slide.id).where(Slide.presentation_id == presentation_id)
+
+    @staticmethod
+    def _append_key(db: Session, key_column, scope) -> int:
+        """Ordering key after the last row in scope"""
+        return db.scalar(select(func.coalesce(func.max(key_column), 0) + ORDER_GAP).where(scope))
+
+    @staticmethod
+    def _gap_key(db: Session, key_column, id_column, scope, after_id: Optional[int],
+                 moving_id: Optional[int], kind: str) -> Optional[int]:
+        """Ordering key for a row placed right after after_id (None: first) in scope.
+
+        Returns None when the key would sit closer than REBALANCE_GAP to a
+        neighbour, and the scope has to be renumbered first.
+        """
+        others = [scope] if moving_id is None else [scope, id_column != moving_id]
+        previous = None
+        if after_id is not None:
+            previous = db.scalar(select(key_column).where(*others, id_column == after_id))
+            if previous is None:
+                raise InvalidOperationError(f"{kind} {after_id} not found")
+
+        following = select(func.min(key_column)).where(*others)
+        if previous is not None:
+            following = following.where(key_column > previous)
+        following = db.scalar(following)
+
+        if following is None:
+            return (previous or 0) + ORDER_GAP
+        if previous is None:
+            if following > ORDER_GAP:
+                return following - ORDER_GAP
+            previous = 0
+        key = (previous + following) // 2
+        if min(key - previous, following - key) < REBALANCE_GAP:
+            return None
+        return key
+
+    @staticmethod
+    def _renumber(db: Session, model, key_attr: str, scope) -> None:
+        """Respace the keys in scope ORDER_GAP apart, keeping their order"""
+        key_column = getattr(model, key_attr)
+        ids = db.scalars(select(model.id).where(scope).order_by(key_column, model.id)).all()
+        if ids:
+            db.execute(update(model), [
+                {'id': row_id, key_attr: (i + 1) * ORDER_GAP} for i, row_id in enumerate(ids)
+            ])
+
+    @staticmethod
+    def _slide_key(db: Session, presentation_id: int, after_id: Optional[int],
+                   moving_id: Optional[int] = None) -> int:
+        scope = Slide.presentation_id == presentation_id
+        args = (Slide.order_index, Slide.id, scope, after_id, moving_id, 'Slide')
+        key = PresentationService._gap_key(db, *args)
+        if key is None:
+            PresentationService._renumber(db, Slide, 'order_index', scope)
+            key = PresentationService._gap_key(db, *args)
+        return key
+
+    @staticmethod
+    def _block_key(db: Session, slide_id: int, after_id: Optional[int],
+                   moving_id: Optional[int] = None) -> int:
+        scope = ContentBlock.slide_id == slide_id
+        args = (ContentBlock.z_index, ContentBlock.id, scope, after_id, moving_id, 'Block')
+        key = PresentationService._gap_key(db, *args)
+        if key is None:
+            PresentationService._renumber(db, ContentBlock, 'z_index', scope)
+            key = PresentationService._gap_key(db, *args)
+        return key
+
+    @staticmethod
+    def _slide_anchor(db: Session, presentation_id: int, data: Dict,
+                      moving_id: Optional[int] = None) -> Optional[int]:
+        """The slide to place after, from data.after_slide_id or a 0-based data.order_index position"""
+        if 'after_slide_id' in data:
+            return data['after_slide_id']
+        position = data['order_index']
+        if position <= 0:
+            return None
+        query = select(Slide.id).where(Slide.presentation_id == presentation_id)
+        if moving_id is not None:
+            query = query.where(Slide.id != moving_id)
+        anchor = db.scalar(query.order_by(Slide.order_index, Slide.id).offset(position - 1).limit(1))
+        if anchor is None:
+            # Past the end: after the last slide
+            anchor = db.scalar(query.order_by(Slide.order_index.desc(), Slide.id.desc()).limit(1))
+        return anchor
+
+    @staticmethod
+    def _op_add_slide(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        data = operation.get('data') or {}
+        if 'after_slide_id' in data or data.get('order_index') is not None:
+            after_id = PresentationService._slide_anchor(db, presentation_id, data)
+            order_index = PresentationService._slide_key(db, presentation_id, after_id)
+        else:
+            order_index = PresentationService._append_key(
+                db, Slide.order_index, Slide.presentation_id == presentation_id
+            )
+
+        slide_id = db.scalar(
+            insert(Slide).returning(Slide.id),
+            PresentationService._slide_row(presentation_id, order_index, data)
+        )
+        blocks = data.get('content_blocks') or []
+        if blocks:
+            db.execute(insert(ContentBlock), [
+                PresentationService._block_row(slide_id, j, block_data)
+                for j, block_data in enumerate(blocks)
+            ])
+        return {'op': 'add_slide', 'slide_id': slide_id, 'order_index': order_index}
+
+    @staticmethod
+    def _op_update_slide(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        slide_id = PresentationService._require(operation, 'slide_id')
+        values = PresentationService._pick(operation.get('data') or {}, SLIDE_FIELDS)
+        if values:
+            result = db.execute(
+                update(Slide)
+                .where(Slide.id == slide_id, Slide.presentation_id == presentation_id)
+                .values(**values)
+            )
+            PresentationService._check_rowcount(result, 'Slide', slide_id)
+        return {'op': 'update_slide', 'slide_id': slide_id}
+
+    @staticmethod
+    def _op_move_slide(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        slide_id = PresentationService._require(operation, 'slide_id')
+        data = operation.get('data') or {}
+        if 'after_slide_id' not in data and data.get('order_index') is None:
+            raise InvalidOperationError("move_slide requires after_slide_id or order_index")
+        PresentationService._check_slide(db, presentation_id, slide_id)
+        if data.get('after_slide_id') == slide_id:
+            raise InvalidOperationError("A slide cannot be moved after itself")
+
+        # Only the moved slide is written
+        after_id = PresentationService._slide_anchor(db, presentation_id, data, slide_id)
+        order_index = PresentationService._slide_key(db, presentation_id, after_id, slide_id)
+        db.execute(update(Slide).where(Slide.id == slide_id).values(order_index=order_index))
+        return {'op': 'move_slide', 'slide_id': slide_id, 'order_index': order_index}
+
+    @staticmethod
+    def _op_delete_slide(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        slide_id = PresentationService._require(operation, 'slide_id')
+        db.execute(
+            delete(ContentBlock)
+            .where(ContentBlock.slide_id == slide_id,
+                   ContentBlock.slide_id.in_(PresentationService._presentation_slides(presentation_id)))
+        )
+        result = db.execute(
+            delete(Slide).where(Slide.id == slide_id, Slide.presentation_id == presentation_id)
+        )
+        PresentationService._check_rowcount(result, 'Slide', slide_id)
+        return {'op': 'delete_slide', 'slide_id': slide_id}
+
+    @staticmethod
+    def _op_add_block(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        slide_id = PresentationService._require(operation, 'slide_id')
+        data = operation.get('data') or {}
+        if not data.get('type'):
+            raise InvalidOperationError("add_block requires data.type")
+
+        PresentationService._check_slide(db, presentation_id, slide_id)
+
+        position = db.scalar(
+            select(func.count(ContentBlock.id)).where(ContentBlock.slide_id == slide_id)
+        )
+        row = PresentationService._block_row(slide_id, position, data)
+        if 'after_block_id' in data:
+            row['z_index'] = PresentationService._block_key(db, slide_id, data['after_block_id'])
+        elif data.get('z_index') is None:
+            row['z_index'] = PresentationService._append_key(
+                db, ContentBlock.z_index, ContentBlock.slide_id == slide_id
+            )
+        block_id = db.scalar(insert(ContentBlock).returning(ContentBlock.id), row)
+        return {'op': 'add_block', 'slide_id': slide_id, 'block_id': block_id}
+
+    @staticmethod
+    def _op_update_block(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        block_id = PresentationService._require(operation, 'block_id')
+        values = PresentationService._pick(operation.get('data') or {}, BLOCK_FIELDS)
+        if values:
+            result = db.execute(
+                update(ContentBlock)
+                .where(ContentBlock.id == block_id,
+                       ContentBlock.slide_id.in_(PresentationService._presentation_slides(presentation_id)))
+                .values(**values)
+            )
+            PresentationService._check_rowcount(result, 'Block', block_id)
+        return {'op': 'update_block', 'block_id': block_id}
+
+    @staticmethod
+    def _op_move_block(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        block_id = PresentationService._require(operation, 'block_id')
+        data = operation.get('data') or {}
+        values = {field: data[field] for field in BLOCK_MOVE_FIELDS if field in data}
+
+        target_slide_id = operation.get('slide_id')
+        if target_slide_id is not None:
+            PresentationService._check_slide(db, presentation_id, target_slide_id)
+            values['slide_id'] = target_slide_id
+
+        if 'after_block_id' in data:
+            if data['after_block_id'] == block_id:
+                raise InvalidOperationError("A block cannot be moved after itself")
+            if target_slide_id is None:
+                target_slide_id = PresentationService._block_slide(db, presentation_id, block_id)
+            values['z_index'] = PresentationService._block_key(
+                db, target_slide_id, data['after_block_id'], block_id
+            )
+        elif target_slide_id is not None and 'z_index' not in data:
+            # Its old key means nothing on another slide: put it on top there
+            if PresentationService._block_slide(db, presentation_id, block_id) != target_slide_id:
+                values['z_index'] = PresentationService._append_key(
+                    db, ContentBlock.z_index, ContentBlock.slide_id == target_slide_id
+                )
+
+        if values:
+            result = db.execute(
+                update(ContentBlock)
+                .where(ContentBlock.id == block_id,
+                       ContentBlock.slide_id.in_(PresentationService._presentation_slides(presentation_id)))
+                .values(**values)
+            )
+            PresentationService._check_rowcount(result, 'Block', block_id)
+        return {'op': 'move_block', 'block_id': block_id}
+
+    @staticmethod
+    def _op_delete_block(db: Session, presentation_id: int, operation: Dict) -> Dict:
+        block_id = PresentationService._require(operation, 'block_id')
+        result = db.execute(
+            delete(ContentBlock)
+            .where(ContentBlock.id == block_id,
+                   ContentBlock.slide_id.in_(PresentationService._presentation_slides(presentation_id)))
+        )
+        PresentationService._check_rowcount(result, 'Block', block_id)
+        return {'op': 'delete_block', 'block_id': block_id}
+
     @staticmethod
     def get_presentation_with_slides(db: Session, presentation_id: int) -> Optional[Dict]:
         """Get presentation with all slides and content blocks"""
-        presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+        # One query per level of the tree (presentation, slides, blocks), so the
+        # round trip count stays constant however many slides the deck has.
+        # Ordering comes from the relationship order_by clauses.
+        presentation = (
+            db.query(Presentation)
+            .options(
+                selectinload(Presentation.slides).selectinload(Slide.content_blocks)
+            )
+            .filter(Presentation.id == presentation_id)
+            .first()
+        )
         if not presentation:
             return None
 
-        result = {
+        return PresentationService.serialize_presentation(presentation)
+
+    @staticmethod
+    def get_version(db: Session, presentation_id: int) -> Optional[int]:
+        return db.scalar(select(Presentation.version).where(Presentation.id == presentation_id))
+
+    @staticmethod
+    def get_revision(db: Session, presentation_id: int) -> Optional[Tuple[str, int]]:
+        """The presentation's (uid, version), which its ETag is made from"""
+        row = db.execute(
+            select(Presentation.uid, Presentation.version).where(Presentation.id == presentation_id)
+        ).first()
+        return tuple(row) if row else None
+
+    @staticmethod
+    def get_presentation_tree(db: Session, presentation_id: int) -> Optional[CachedTree]:
+        """The serialized tree and its encoded JSON body, from the tree cache when current"""
+        revision = PresentationService.get_revision(db, presentation_id)
+        if revision is None:
+            return None
+        uid, version = revision
+        cached = tree_cache.get(presentation_id, uid, version)
+        if cached is not None:
+            return cached
+
+        data = PresentationService.get_presentation_with_slides(db, presentation_id)
+        if data is None:
+            return None
+        return tree_cache.put(presentation_id, uid, data)
+
+    @staticmethod
+    def get_presentation_summary(db: Session, presentation_id: int) -> Optional[Dict]:
+        """Get top-level presentation fields without loading any slides"""
+        row = db.query(
+            Presentation.id,
+            Presentation.title,
+            Presentation.description,
+            Presentation.theme,
+            Presentation.version,
+            Presentation.created_at,
+            Presentation.updated_at
+        ).filter(Presentation.id == presentation_id).first()
+        return dict(row._mapping) if row else None
+
+    @staticmethod
+    def get_slide_batch(db: Session, presentation_id: int, after: Optional[Tuple[int, int]] = None,
+                        batch_size: int = 50) -> List[Dict]:
+        """Serialized slides in order, starting after the (order_index, id) key"""
+        query = (
+            db.query(Slide)
+            .options(selectinload(Slide.content_blocks))
+            .filter(Slide.presentation_id == presentation_id)
+        )
+        if after is not None:
+            query = query.filter(tuple_(Slide.order_index, Slide.id) > tuple_(*after))
+        slides = query.order_by(Slide.order_index, Slide.id).limit(batch_size).all()
+        return [PresentationService.serialize_slide(slide) for slide in slides]
+
+    @staticmethod
+    def iter_slides(db: Session, presentation_id: int, batch_size: int = 50) -> Iterator[Dict]:
+        """Yield serialized slides in order, loading them a batch at a time"""
+        after = None
+        while True:
+            slides = PresentationService.get_slide_batch(db, presentation_id, after, batch_size)
+            yield from slides
+            if len(slides) < batch_size:
+                return
+            after = (slides[-1]['order_index'], slides[-1]['id'])
+
+    @staticmethod
+    async def aiter_slides(db: AsyncSession, presentation_id: int, batch_size: int = 50) -> AsyncIterator[Dict]:
+        """iter_slides for an AsyncSession; the event loop is free between batches"""
+        after = None
+        while True:
+            slides = await db.run_sync(PresentationService.get_slide_batch, presentation_id, after, batch_size)
+            for slide in slides:
+                yield slide
+            if len(slides) < batch_size:
+                return
+            after = (slides[-1]['order_index'], slides[-1]['id'])
+
+    @staticmethod
+    def serialize_presentation(presentation: Presentation) -> Dict:
+        """Convert a loaded presentation tree to its API representation"""
+        return {
             'id': presentation.id,
             'title': presentation.title,
             'description': presentation.description,
             'theme': presentation.theme,
             'settings': presentation.settings,
+            'version': presentation.version,
             'created_at': presentation.created_at,
             'updated_at': presentation.updated_at,
-            'slides': []
+            'slides': [
+                PresentationService.serialize_slide(slide)
+                for slide in presentation.slides
+            ]
         }
 
-        for slide in sorted(presentation.slides, key=lambda x: x.order_index):
-            slide_data = {
-                'id': slide.id,
-                'title': slide.title,
-                'layout': slide.layout,
-                'background': slide.background,
-                'animations': slide.animations,
-                'order_index': slide.order_index,
-                'content_blocks': []
-            }
+    @staticmethod
+    def serialize_slide(slide: Slide) -> Dict:
+        """Convert a slide and its content blocks to their API representation"""
+        return {
+            'id': slide.id,
+            'title': slide.title,
+            'layout': slide.layout,
+            'background': slide.background,
+            'animations': slide.animations,
+            'order_index': slide.order_index,
+            'content_blocks': [
+                PresentationService.serialize_block(block)
+                for block in slide.content_blocks
+            ]
+        }
 
-            for block in sorted(slide.content_blocks, key=lambda x: x.z_index):
-                block_data = {
-                    'id': block.id,
-                    'type': block.type,
-                    'content': block.content,
-                    'metadata': block.block_metadata,  # Map back to 'metadata' for API response
-                    'position_x': block.position_x,
-                    'position_y': block.position_y,
-                    'width': block.width,
-                    'height': block.height,
-                    'z_index': block.z_index,
-                    'styles': block.styles
-                }
-                slide_data['content_blocks'].append(block_data)
-
-            result['slides'].append(slide_data)
-
-        return result
\ No newline at end of file
+    @staticmethod
+    def serialize_block(block: ContentBlock) -> Dict:
+        """Convert a content block to its API representation"""
+        return {
+            'id': block.id,
+            'type': block.type,
+            'content': block.content,
+            'metadata': block.block_metadata,  # Map back to 'metadata' for API response
+            'position_x': block.position_x,
+            'position_y': block.position_y,
+            'width': block.width,
+            'height': block.height,
+            'z_index': block.z_index,
+            'styles': block.styles
+        }
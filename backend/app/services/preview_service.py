@@ -0,0 +1,73 @@
+from html import escape
+from string import Template
+from typing import AsyncIterable, AsyncIterator, Dict
+
+PAGE_HEADER = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>$title</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; }
+        .slide { margin-bottom: 40px; border: 1px solid #ddd; padding: 20px; }
+        .slide-title { font-size: 24px; font-weight: bold; margin-bottom: 15px; }
+        .content-block { margin-bottom: 15px; }
+        .text-block { font-size: 16px; line-height: 1.6; white-space: pre-wrap; }
+        .image-block { max-width: 100%; height: auto; }
+    </style>
+</head>
+<body>
+    <h1>$title</h1>
+    <p>$description</p>
+""")
+PAGE_FOOTER = "</body></html>\n"
+SLIDE_HEADER = Template("""    <div class="slide">
+        <div class="slide-title">Slide $number: $title</div>
+""")
+SLIDE_FOOTER = "    </div>\n"
+
+# One precompiled template per block type; other block types are not previewed
+BLOCK_TEMPLATES = {
+    'text': Template('        <div class="content-block text-block">$content</div>\n'),
+    'image': Template('        <div class="content-block"><img class="image-block" src="$src" alt="$alt" loading="lazy"></div>\n')
+}
+
+
+class PreviewService:
+    @staticmethod
+    def render_block(block: Dict) -> str:
+        """Render a single content block, escaping all user content"""
+        template = BLOCK_TEMPLATES.get(block['type'])
+        if template is None:
+            return ''
+        if block['type'] == 'image':
+            return template.substitute(
+                src=escape(block.get('file_path') or block.get('content') or ''),
+                alt=escape((block.get('metadata') or {}).get('originalName') or 'Image')
+            )
+        return template.substitute(content=escape(block.get('content') or ''))
+
+    @staticmethod
+    def render_slide(number: int, slide: Dict) -> str:
+        """Render a slide with its content blocks"""
+        parts = [SLIDE_HEADER.substitute(number=number, title=escape(slide.get('title') or 'Untitled'))]
+        parts.extend(PreviewService.render_block(block) for block in slide.get('content_blocks', []))
+        parts.append(SLIDE_FOOTER)
+        return ''.join(parts)
+
+    @staticmethod
+    async def iter_html(presentation: Dict, slides: AsyncIterable[Dict]) -> AsyncIterator[str]:
+        """Yield the preview page piece by piece: header, one chunk per slide, footer.
+
+        slides may be a lazy async iterator, so the first bytes go out before the
+        rest of the deck has been loaded.
+        """
+        yield PAGE_HEADER.substitute(
+            title=escape(presentation['title'] or ''),
+            description=escape(presentation.get('description') or '')
+        )
+        number = 0
+        async for slide in slides:
+            number += 1
+            yield PreviewService.render_slide(number, slide)
+        yield PAGE_FOOTER
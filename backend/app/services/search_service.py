@@ -0,0 +1,151 @@
+import html
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from ..utils.helpers import decode_cursor, encode_cursor
+
+# Every indexed document gets a key of id * 4 + kind, so hits from the three
+# tables share one ranking and the SQLite index can be updated by rowid.
+KIND_PRESENTATION = 1
+KIND_SLIDE = 2
+KIND_BLOCK = 3
+KIND_NAMES = {KIND_PRESENTATION: 'presentation', KIND_SLIDE: 'slide', KIND_BLOCK: 'block'}
+
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+# The database highlights matches with these control characters, which
+# can't occur in escaped text; they become SNIPPET_START/END after the rest
+# of the snippet has been HTML-escaped.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+# -- SQLite: one FTS5 table kept in sync by triggers ------------------------
+# The search_index table and its triggers are created by the
+# e5a19c3b8f20_add_search_index migration.
+
+# bm25 is lower-is-better; titles weigh ten times as much as body text
+SQLITE_SEARCH = """
+    SELECT * FROM (
+        SELECT si.rowid AS doc_key, si.presentation_id, si.slide_id, p.title AS presentation_title,
+               snippet(search_index, -1, :match_start, :match_end, '…', 16) AS snippet,
+               bm25(search_index, 0.0, 0.0, 10.0, 1.0) AS rank
+        FROM search_index si JOIN presentations p ON p.id = si.presentation_id
+        WHERE search_index MATCH :query
+    )
+    WHERE :last_rank IS NULL OR (rank, doc_key) > (:last_rank, :last_key)
+    ORDER BY rank, doc_key
+    LIMIT :limit
+"""
+
+# -- Postgres: expression GIN indexes, maintained by the database -----------
+
+# Search queries must repeat these expressions for the GIN indexes, created
+# by the e5a19c3b8f20_add_search_index migration, to apply
+PG_PRESENTATION_DOC = "coalesce({t}title, '') || ' ' || coalesce({t}description, '')"
+PG_SLIDE_DOC = "coalesce({t}title, '')"
+PG_BLOCK_DOC = "coalesce({t}content, '')"
+
+# The headline is only computed for the page of hits being returned
+PG_SEARCH = f"""
+    WITH q AS (SELECT to_tsquery('english', :query) AS query),
+    hits AS (
+        SELECT p.id * 4 + 1 AS doc_key, p.id AS presentation_id, NULL::integer AS slide_id,
+               p.title AS presentation_title, {PG_PRESENTATION_DOC.format(t="p.")} AS document,
+               -ts_rank(to_tsvector('english', {PG_PRESENTATION_DOC.format(t="p.")}), q.query) * 10 AS rank
+        FROM presentations p, q
+        WHERE to_tsvector('english', {PG_PRESENTATION_DOC.format(t="p.")}) @@ q.query
+        UNION ALL
+        SELECT s.id * 4 + 2, s.presentation_id, s.id, p.title, {PG_SLIDE_DOC.format(t="s.")},
+               -ts_rank(to_tsvector('english', {PG_SLIDE_DOC.format(t="s.")}), q.query) * 10
+        FROM slides s JOIN presentations p ON p.id = s.presentation_id, q
+        WHERE to_tsvector('english', {PG_SLIDE_DOC.format(t="s.")}) @@ q.query
+        UNION ALL
+        SELECT b.id * 4 + 3, s.presentation_id, s.id, p.title, {PG_BLOCK_DOC.format(t="b.")},
+               -ts_rank(to_tsvector('english', {PG_BLOCK_DOC.format(t="b.")}), q.query)
+        FROM content_blocks b JOIN slides s ON s.id = b.slide_id
+             JOIN presentations p ON p.id = s.presentation_id, q
+        WHERE b.type = 'text' AND to_tsvector('english', {PG_BLOCK_DOC.format(t="b.")}) @@ q.query
+    ),
+    page AS (
+        SELECT * FROM hits
+        WHERE CAST(:last_rank AS double precision) IS NULL
+           OR (rank, doc_key) > (CAST(:last_rank AS double precision), :last_key)
+        ORDER BY rank, doc_key
+        LIMIT :limit
+    )
+    SELECT doc_key, presentation_id, slide_id, presentation_title, rank,
+           ts_headline('english', document, q.query,
+                       'StartSel=' || :match_start || ', StopSel=' || :match_end
+                       || ', MaxWords=16, MinWords=4') AS snippet
+    FROM page, q
+    ORDER BY rank, doc_key
+"""
+
+
+class SearchService:
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        return re.findall(r'\w+', query)
+
+    @staticmethod
+    def _sqlite_query(terms: List[str]) -> str:
+        # Every term must match; the last one as a prefix for search-as-you-type
+        return ' '.join(f'"{term}"' for term in terms) + '*'
+
+    @staticmethod
+    def _pg_query(terms: List[str]) -> str:
+        return ' & '.join(terms) + ':*'
+
+    @staticmethod
+    def _snippet_html(snippet: Optional[str]) -> Optional[str]:
+        """Escape a highlighted snippet of stored text, marking up only the matches"""
+        if snippet is None:
+            return None
+        return (html.escape(snippet)
+                .replace(MATCH_START, SNIPPET_START)
+                .replace(MATCH_END, SNIPPET_END))
+
+    @staticmethod
+    def search(db: Session, query: str, limit: int = 20,
+               cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Ranked hits across presentations, slide titles and text blocks.
+
+        Returns (hits, next_cursor); pages are keyed on (rank, document key).
+        """
+        terms = SearchService._terms(query)
+        if not terms:
+            return [], None
+
+        last_rank, last_key = decode_cursor(cursor) if cursor else (None, None)
+        if last_rank is not None and not isinstance(last_rank, (int, float)):
+            raise ValueError("Invalid cursor")
+        if db.get_bind().dialect.name == 'sqlite':
+            statement, match = SQLITE_SEARCH, SearchService._sqlite_query(terms)
+        else:
+            statement, match = PG_SEARCH, SearchService._pg_query(terms)
+        rows = db.execute(text(statement), {
+            'query': match,
+            'last_rank': last_rank,
+            'last_key': last_key,
+            'limit': limit + 1,
+            'match_start': MATCH_START,
+            'match_end': MATCH_END
+        }).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1].doc_key)
+        return [
+            {
+                'type': KIND_NAMES[row.doc_key % 4],
+                'presentation_id': row.presentation_id,
+                'presentation_title': row.presentation_title,
+                'slide_id': row.slide_id,
+                'block_id': row.doc_key // 4 if row.doc_key % 4 == KIND_BLOCK else None,
+                'snippet': SearchService._snippet_html(row.snippet),
+                'score': -row.rank
+            }
+            for row in rows
+        ], next_cursor
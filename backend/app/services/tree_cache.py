@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+import orjson
+from typing import Dict, NamedTuple, Optional
+from ..config import settings
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON only
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def encode_msgpack(data: Dict) -> bytes:
+    """MessagePack form of a serialized tree, with timestamps as ISO strings like the JSON"""
+    return msgpack.packb(
+        data, default=lambda value: value.isoformat() if isinstance(value, date) else str(value)
+    )
+
+
+class CachedTree(NamedTuple):
+    uid: str
+    version: int
+    data: Dict  # Shared between readers; treat as read-only
+    body: bytes  # data encoded as the JSON response body
+
+
+class PresentationTreeCache:
+    """In-process LRU of serialized presentation trees.
+
+    Holds at most one entry per presentation, valid only for the row (uid)
+    and version it was built from, so any write that bumps the version, or a
+    new presentation reusing a deleted one's id, makes the entry unreachable;
+    writers also invalidate explicitly to free the memory at once. Bounded
+    by the total size of the encoded bodies.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CachedTree]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(data: Dict) -> bytes:
+        # orjson handles datetimes itself, skipping jsonable_encoder entirely
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    def get(self, presentation_id: int, uid: str, version: int) -> Optional[CachedTree]:
+        with self._lock:
+            entry = self._entries.get(presentation_id)
+            if entry is None or entry.uid != uid or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(presentation_id)
+            self.hits += 1
+            return entry
+
+    def put(self, presentation_id: int, uid: str, data: Dict) -> CachedTree:
+        """Encode a freshly loaded tree and cache it under its row and version"""
+        entry = CachedTree(uid, data['version'], data, self.encode(data))
+        if len(entry.body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            current = self._entries.get(presentation_id)
+            if current is not None and current.uid == uid and current.version > entry.version:
+                # A newer version was cached while this one was loading
+                return entry
+            self._discard(presentation_id)
+            self._entries[presentation_id] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+        return entry
+
+    def invalidate(self, presentation_id: int) -> None:
+        with self._lock:
+            self._discard(presentation_id)
+
+    def _discard(self, presentation_id: int) -> None:
+        entry = self._entries.pop(presentation_id, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_size': self.max_bytes
+            }
+
+
+tree_cache = PresentationTreeCache(settings.tree_cache_max_size)
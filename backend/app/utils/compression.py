@@ -0,0 +1,166 @@
+import gzip
+from typing import Optional, Tuple
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Content types that are already compressed or gain nothing from it
+INCOMPRESSIBLE_TYPES = (
+    "image/", "video/", "audio/", "application/zip", "application/gzip",
+    "application/pdf", "application/vnd.openxmlformats-officedocument",
+    "application/msgpack", "text/event-stream",
+)
+
+# Bodies above this are compressed off the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The ETag of a representation once compressed with the given coding"""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}+{encoding}"'
+
+
+def decoded_etags(if_none_match: str, encoding: str) -> Tuple[str, bool]:
+    """Strip the encoding's suffix from If-None-Match tags.
+
+    Returns the header the app should see and whether any tag carried the
+    suffix, in which case a 304 has to name the encoded tag again.
+    """
+    suffix = f'+{encoding}"'
+    tags, stripped = [], False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.endswith(suffix):
+            tag, stripped = tag[:-len(suffix)] + '"', True
+        tags.append(tag)
+    return ", ".join(tags), stripped
+
+
+class CompressionMiddleware:
+    """Compress complete responses with brotli or gzip, as the client accepts.
+
+    Only responses sent as a single body message are compressed; streamed
+    responses (SSE, previews, file downloads) pass through untouched so
+    their chunks still flush as they are produced.
+
+    A compressed response's strong ETag gets a `+br`/`+gzip` suffix, since
+    its bytes differ from the identity body's. The suffix is stripped from
+    If-None-Match before the app compares it, and restored on the 304.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        revalidating = False
+        if "if-none-match" in request_headers:
+            if_none_match, revalidating = decoded_etags(request_headers["if-none-match"], encoding)
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, if_none_match.encode("latin-1") if name == b"if-none-match" else value)
+                for name, value in scope["headers"]
+            ]
+        await self.app(scope, receive, CompressionResponder(self, encoding, send, revalidating))
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send,
+                 revalidating: bool = False):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        # The client's If-None-Match named the encoded tag
+        self.revalidating = revalidating
+        self.start: Optional[Message] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if message["status"] == 304 and self.revalidating:
+                self._encode_etag(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+                self.passthrough = True
+                return
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        if message.get("more_body", False) or not self._compressible(start, body):
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        if len(body) > THREAD_THRESHOLD:
+            compressed = await anyio.to_thread.run_sync(self.middleware.compress, self.encoding, body)
+        else:
+            compressed = self.middleware.compress(self.encoding, body)
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        self._encode_etag(headers)
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _encode_etag(self, headers: MutableHeaders) -> None:
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+
+    def _compressible(self, start: Message, body: bytes) -> bool:
+        if len(body) < self.middleware.minimum_size:
+            return False
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(INCOMPRESSIBLE_TYPES)
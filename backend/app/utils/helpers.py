@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import String, or_, and_, type_coerce
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode keyset pagination values into an opaque URL-safe cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a (sort value, id) cursor produced by encode_cursor.
+
+    Raises ValueError if it is malformed or has been tampered with.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    value, row_id = values
+    # bool is an int subclass, but never a sort value or id
+    if isinstance(value, bool) or not (value is None or isinstance(value, (str, int, float))):
+        raise ValueError("Invalid cursor")
+    if isinstance(row_id, bool) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_column(db: Session, column):
+    """Return the expression keyset pagination should compare on.
+
+    SQLite keeps timestamps as text, so the stored text is compared as-is and
+    cursor values round-trip exactly; other dialects compare native values.
+    """
+    if db.get_bind().dialect.name == 'sqlite':
+        return type_coerce(column, String)
+    return column
+
+
+def keyset_value(db: Session, value: Any) -> Any:
+    """Convert a decoded cursor value back to what keyset_column compares against"""
+    if value is None or db.get_bind().dialect.name == 'sqlite':
+        return value
+    if not isinstance(value, str):
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(value)
+
+
+def keyset_page(db: Session, query, sort_column, id_column, limit: int,
+                cursor: Optional[str] = None, descending: bool = True) -> Tuple[List, Optional[str]]:
+    """Apply (sort_column, id) keyset pagination and return (rows, next_cursor).
+
+    The query must select the sort key labelled ``sort_key`` and the row id.
+    """
+    sort_expr = keyset_column(db, sort_column)
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        last_value = keyset_value(db, last_value)
+        if descending:
+            query = query.filter(or_(
+                sort_expr < last_value,
+                and_(sort_expr == last_value, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_expr > last_value,
+                and_(sort_expr == last_value, id_column > last_id)
+            ))
+
+    if descending:
+        query = query.order_by(sort_expr.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), id_column.asc())
+
+    rows = query.add_columns(sort_expr.label('sort_key')).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].sort_key, rows[-1].id)
+    return rows, next_cursor
+
+
+
+def version_etag(uid: str, version: int, variant: Optional[str] = None) -> str:
+    """ETag for a version of the presentation row identified by uid.
+
+    Representations other than the JSON default name themselves in a
+    `+variant` suffix, as CompressionMiddleware does for content codings,
+    so every body sent for a version has its own strong validator.
+    """
+    if variant:
+        return f'"{uid}-{version}+{variant}"'
+    return f'"{uid}-{version}"'
+
+
+def parse_version_etag(etag: str) -> Tuple[str, int]:
+    """Parse an If-Match/If-None-Match value produced by version_etag into (uid, version),
+    raising ValueError if malformed"""
+    value = etag.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    # Any representation or encoding of a version names the same revision
+    value = value.strip('"').partition('+')[0]
+    uid, separator, version = value.rpartition('-')
+    if not separator or not uid:
+        raise ValueError("Invalid presentation ETag")
+    return uid, int(version)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the given ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return opaque(etag) in {opaque(tag) for tag in if_none_match.split(',')}
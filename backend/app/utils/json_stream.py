@@ -0,0 +1,71 @@
+import json
+from typing import Dict, List, Optional
+
+
+class JSONArrayStreamParser:
+    """Pull complete elements out of one top-level array field of streamed JSON.
+
+    Feed it text as it arrives; each call returns the array elements that
+    were completed by that chunk, e.g. every finished slide of
+    {"title": ..., "slides": [{...}, {...}]} long before the closing brace.
+    The full text is kept so the whole document can be parsed at the end.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # The last string closed in the top-level object before
+                        # a '[' is always that array's key
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in '{[':
+                if (char == '[' and self._depth == 1 and self._array_depth is None
+                        and self._last_key == self.field):
+                    self._array_depth = self._depth + 1
+                elif self._array_depth is not None and self._depth == self._array_depth:
+                    self._element_start = i
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._depth == self._array_depth and self._element_start is not None:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                        self._element_start = None
+                    elif self._depth < self._array_depth:
+                        # Array closed; stop looking for elements
+                        self._array_depth = -1
+        self._pos = len(text)
+        return completed
+
+    def result(self) -> Dict:
+        """Parse the complete document once the stream has ended"""
+        start = self.text.find('{')
+        end = self.text.rfind('}')
+        return json.loads(self.text[start:end + 1])
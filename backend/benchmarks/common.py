@@ -0,0 +1,82 @@
+"""Shared setup for the benchmark scripts.
+
+Import this before anything from app: like tests/conftest.py, it points the
+app at a throwaway SQLite database and storage directory, since settings
+are read once at import time. Set DATABASE_URL to benchmark another
+database instead.
+
+Run a benchmark from the backend directory, e.g.
+    python -m benchmarks.create_presentation
+"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence
+
+import uvicorn
+from sqlalchemy import event
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+workdir = tempfile.mkdtemp(prefix="edupresent-bench-")
+os.chdir(workdir)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+
+
+def load_app():
+    """Import the app, which sets up the schema as it does at startup, and return it"""
+    from app.main import app
+    return app
+
+
+@contextmanager
+def recorded_statements(*engines) -> Iterator[List[str]]:
+    """SQL statements sent through the given (sync) engines inside the block"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield sent
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+
+@contextmanager
+def serve(app) -> Iterator[str]:
+    """Run an ASGI app with uvicorn in a background thread; yields its base URL.
+
+    Timings over a real socket include what TestClient hides: streaming,
+    the event loop being blocked, and concurrent requests.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="critical"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence]) -> None:
+    cells = [[str(value) for value in row] for row in [headers, *rows]]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * width for width in widths))
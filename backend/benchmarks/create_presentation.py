@@ -0,0 +1,61 @@
+"""Time and count the SQL statements of creating 10-, 100- and 1000-slide decks.
+
+create_presentation inserts slides and blocks with multi-row INSERTs, so the
+statement count should stay flat as the deck grows.
+"""
+import time
+
+from benchmarks.common import load_app, print_table, recorded_statements
+
+from app.database import SessionLocal, engine
+from app.services.presentation_service import PresentationService
+
+SLIDE_COUNTS = (10, 100, 1000)
+BLOCKS_PER_SLIDE = 3
+REPEATS = 5
+
+
+def deck(slide_count: int) -> dict:
+    return {
+        "title": f"{slide_count}-slide deck",
+        "description": "Benchmark",
+        "slides": [
+            {
+                "title": f"Slide {n}",
+                "content_blocks": [
+                    {"type": "text", "content": f"Point {k} of slide {n}"}
+                    for k in range(BLOCKS_PER_SLIDE)
+                ]
+            }
+            for n in range(slide_count)
+        ]
+    }
+
+
+def main() -> None:
+    load_app()
+    rows = []
+    for slide_count in SLIDE_COUNTS:
+        data = deck(slide_count)
+        times = []
+        for _ in range(REPEATS):
+            db = SessionLocal()
+            try:
+                with recorded_statements(engine) as statements:
+                    start = time.perf_counter()
+                    PresentationService.create_presentation(db, data)
+                    times.append(time.perf_counter() - start)
+            finally:
+                db.close()
+        best = min(times)
+        rows.append([
+            slide_count, slide_count * BLOCKS_PER_SLIDE, len(statements),
+            f"{best * 1000:.1f}", f"{sorted(times)[len(times) // 2] * 1000:.1f}",
+            f"{slide_count / best:,.0f}"
+        ])
+    print(f"create_presentation on {engine.dialect.name}, best and median of {REPEATS}")
+    print_table(["slides", "blocks", "statements", "best ms", "median ms", "slides/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
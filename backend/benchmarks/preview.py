@@ -0,0 +1,129 @@
+"""Time to first byte and total time of the HTML preview of a 500-slide deck.
+
+Compares the streaming, template-based GET /api/export/preview/{id} with the
+renderer it replaced, which built the whole page with repeated += on one
+string after loading the full tree, mounted here at /legacy-preview/{id}.
+"""
+import statistics
+import time
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from benchmarks.common import print_table, serve
+
+from app.database import SessionLocal, get_db
+from app.main import app
+from app.services.presentation_service import PresentationService
+
+SLIDE_COUNT = 500
+REPEATS = 5
+
+legacy = APIRouter()
+
+
+@legacy.get("/legacy-preview/{presentation_id}")
+async def legacy_preview(presentation_id: int, db: Session = Depends(get_db)):
+    """The preview endpoint as it was before streaming, unchanged"""
+    presentation = PresentationService.get_presentation_with_slides(db, presentation_id)
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>{presentation['title']}</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
+            .slide {{ margin-bottom: 40px; border: 1px solid #ddd; padding: 20px; }}
+            .slide-title {{ font-size: 24px; font-weight: bold; margin-bottom: 15px; }}
+            .content-block {{ margin-bottom: 15px; }}
+            .text-block {{ font-size: 16px; line-height: 1.6; }}
+            .image-block {{ max-width: 100%; height: auto; }}
+        </style>
+    </head>
+    <body>
+        <h1>{presentation['title']}</h1>
+        <p>{presentation.get('description', '')}</p>
+    """
+
+    for i, slide in enumerate(presentation['slides'], 1):
+        html_content += f"""
+        <div class="slide">
+            <div class="slide-title">Slide {i}: {slide.get('title', 'Untitled')}</div>
+        """
+
+        for block in slide.get('content_blocks', []):
+            if block['type'] == 'text':
+                html_content += f'<div class="content-block text-block">{block["content"]}</div>'
+            elif block['type'] == 'image':
+                html_content += f'<div class="content-block"><img class="image-block" src="{block.get("file_path", "")}" alt="Image"></div>'
+
+        html_content += "</div>"
+
+    html_content += "</body></html>"
+
+    return Response(content=html_content, media_type="text/html")
+
+
+app.include_router(legacy)
+
+
+def create_deck() -> int:
+    db = SessionLocal()
+    try:
+        return PresentationService.create_presentation(db, {
+            "title": f"{SLIDE_COUNT}-slide deck",
+            "slides": [
+                {
+                    "title": f"Slide {n}",
+                    "content_blocks": [
+                        {"type": "text", "content": f"Paragraph {k} of slide {n}. " * 8}
+                        for k in range(3)
+                    ] + [{"type": "image", "content": f"/uploads/figure{n}.png"}]
+                }
+                for n in range(SLIDE_COUNT)
+            ]
+        }).id
+    finally:
+        db.close()
+
+
+def fetch(client: httpx.Client, url: str):
+    """(time to first body byte, total time, body size) of one GET"""
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    with client.stream("GET", url) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+    return first_byte, time.perf_counter() - start, size
+
+
+def main() -> None:
+    presentation_id = create_deck()
+    rows = []
+    # Uncompressed, so both are measured on the same bytes
+    headers = {"Accept-Encoding": "identity"}
+    with serve(app) as base_url, httpx.Client(base_url=base_url, headers=headers, timeout=60) as client:
+        for name, path in [("+= (before)", f"/legacy-preview/{presentation_id}"),
+                           ("streaming", f"/api/export/preview/{presentation_id}")]:
+            fetch(client, path)  # Warm up
+            runs = [fetch(client, path) for _ in range(REPEATS)]
+            rows.append([
+                name,
+                f"{statistics.median(run[0] for run in runs) * 1000:.1f}",
+                f"{statistics.median(run[1] for run in runs) * 1000:.1f}",
+                f"{runs[-1][2]:,}"
+            ])
+    print(f"HTML preview of a {SLIDE_COUNT}-slide deck, median of {REPEATS}")
+    print_table(["renderer", "TTFB ms", "total ms", "bytes"], rows)
+
+
+if __name__ == "__main__":
+    main()
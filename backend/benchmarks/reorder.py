@@ -0,0 +1,61 @@
+"""Cost of moving a slide, against deck size.
+
+A move takes the midpoint of its new neighbours' keys and writes only the
+moved row, so it should cost the same at any size. Repeatedly moving into
+the same gap wears it down until the move renumbers the whole deck inline;
+that move is O(deck), and happens once every few moves into one spot.
+"""
+import time
+
+from benchmarks.common import load_app, print_table, recorded_statements
+
+from app.database import SessionLocal, engine
+from app.services.presentation_service import PresentationService
+
+SLIDE_COUNTS = (10, 100, 1000, 5000)
+MOVES = 30
+
+
+def main() -> None:
+    load_app()
+    rows = []
+    for slide_count in SLIDE_COUNTS:
+        db = SessionLocal()
+        try:
+            presentation = PresentationService.create_presentation(db, {
+                "title": f"{slide_count}-slide deck",
+                "slides": [{"title": f"Slide {n}"} for n in range(slide_count)]
+            })
+            presentation_id, version = presentation.id, presentation.version
+            slide_ids = [slide.id for slide in sorted(presentation.slides, key=lambda slide: slide.order_index)]
+            db.expunge_all()
+
+            # Alternate the last two slides into the gap after the first one
+            plain, renumbering = [], []
+            for n in range(MOVES):
+                moving = slide_ids[-1 - n % 2]
+                with recorded_statements(engine) as statements:
+                    start = time.perf_counter()
+                    _, version, _ = PresentationService.apply_operations(db, presentation_id, version, [
+                        {"op": "move_slide", "slide_id": moving, "data": {"after_slide_id": slide_ids[0]}}
+                    ])
+                    elapsed = time.perf_counter() - start
+                # Only a renumber reads the scope's ids in order
+                renumbered = any("ORDER BY slides.order_index" in statement for statement in statements)
+                (renumbering if renumbered else plain).append((elapsed, len(statements)))
+        finally:
+            db.close()
+
+        plain.sort()
+        rows.append([
+            slide_count,
+            f"{plain[len(plain) // 2][0] * 1000:.2f}", plain[len(plain) // 2][1],
+            len(renumbering),
+            f"{max(t for t, _ in renumbering) * 1000:.1f}" if renumbering else "-"
+        ])
+    print(f"{MOVES} move_slide batches per deck on {engine.dialect.name}, all into the same spot")
+    print_table(["slides", "move ms (median)", "statements", "renumbering moves", "renumber ms (max)"], rows)
+
+
+if __name__ == "__main__":
+    main()
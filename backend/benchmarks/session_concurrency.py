@@ -0,0 +1,142 @@
+"""Requests per second with sync vs async database sessions under mixed load.
+
+Concurrent clients mostly load a small presentation tree; every fifth
+request instead runs a query that waits 100 ms in the database, like a slow
+query on a Postgres server (pg_sleep there; on SQLite a sleep() SQL function
+registered here, which waits without holding the GIL). The same handlers are mounted twice, once
+on a blocking sync Session (how every route worked before get_async_db) and
+once on the request-scoped AsyncSession.
+
+A sync Session inside an async route blocks the event loop while the
+database works, so every other request waits behind the slow ones. Note that
+AsyncSession.run_sync still runs the ORM and serialization on the event loop
+thread; only waiting on the database is handed off, so the gain is in
+database time, not in Python-heavy work such as serializing huge trees.
+"""
+import asyncio
+import statistics
+import time
+from functools import partial
+
+import httpx
+from fastapi import APIRouter, Depends
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from benchmarks.common import print_table, serve
+
+from app.database import SessionLocal, async_engine, engine, get_async_db, get_db
+from app.main import app
+from app.services.presentation_service import PresentationService
+
+# Below the pool's size + overflow: with more, the sync variant deadlocks, as
+# a handler blocking the loop on pool checkout stops other requests from
+# finishing and returning their connections
+CLIENTS = 12
+DURATION = 5.0  # Seconds per variant
+SLOW_EVERY = 5
+
+SLOW_QUERY_SECONDS = 0.1
+SLOW_QUERY = text(
+    "SELECT pg_sleep(:seconds)" if engine.dialect.name == "postgresql" else "SELECT sleep(:seconds)"
+).bindparams(seconds=SLOW_QUERY_SECONDS)
+
+
+def add_sqlite_sleep(dbapi_connection, connection_record) -> None:
+    dbapi_connection.create_function("sleep", 1, partial(time.sleep))
+
+variants = APIRouter()
+
+
+@variants.get("/bench/sync/tree/{presentation_id}")
+async def tree_sync(presentation_id: int, db: Session = Depends(get_db)):
+    return PresentationService.get_presentation_with_slides(db, presentation_id)
+
+
+@variants.get("/bench/sync/slow")
+async def slow_sync(db: Session = Depends(get_db)):
+    return {"count": db.scalar(SLOW_QUERY)}
+
+
+@variants.get("/bench/async/tree/{presentation_id}")
+async def tree_async(presentation_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(PresentationService.get_presentation_with_slides, presentation_id)
+
+
+@variants.get("/bench/async/slow")
+async def slow_async(db: AsyncSession = Depends(get_async_db)):
+    return {"count": await db.scalar(SLOW_QUERY)}
+
+
+app.include_router(variants)
+
+
+def create_deck(slide_count: int) -> int:
+    db = SessionLocal()
+    try:
+        return PresentationService.create_presentation(db, {
+            "title": f"{slide_count}-slide deck",
+            "slides": [
+                {"title": f"Slide {n}", "content_blocks": [
+                    {"type": "text", "content": f"Point {k}"} for k in range(3)
+                ]}
+                for n in range(slide_count)
+            ]
+        }).id
+    finally:
+        db.close()
+
+
+async def run_load(base_url: str, prefix: str, presentation_id: int):
+    """Latencies of the (tree, slow) requests completed within DURATION"""
+    trees, slow = [], []
+    deadline = time.perf_counter() + DURATION
+
+    async def client_loop(client: httpx.AsyncClient, worker: int) -> None:
+        n = worker
+        while time.perf_counter() < deadline:
+            is_slow = n % SLOW_EVERY == 0
+            n += 1
+            start = time.perf_counter()
+            response = await client.get(f"{prefix}/slow" if is_slow else f"{prefix}/tree/{presentation_id}")
+            response.raise_for_status()
+            (slow if is_slow else trees).append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=CLIENTS)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(CLIENTS)))
+    return trees, slow
+
+
+def percentile(values, fraction: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main() -> None:
+    if engine.dialect.name == "sqlite":
+        # The async engine has not connected yet. The sync one has (schema
+        # creation), so drop its pooled connections to pick up the function.
+        event.listen(async_engine.sync_engine, "connect", add_sqlite_sleep)
+        event.listen(engine, "connect", add_sqlite_sleep)
+        engine.dispose()
+    presentation_id = create_deck(5)
+    rows = []
+    with serve(app) as base_url:
+        for name, prefix in [("sync Session", "/bench/sync"), ("AsyncSession", "/bench/async")]:
+            asyncio.run(run_load(base_url, prefix, presentation_id))  # Warm up
+            trees, slow = asyncio.run(run_load(base_url, prefix, presentation_id))
+            rows.append([
+                name,
+                f"{(len(trees) + len(slow)) / DURATION:.0f}",
+                f"{statistics.median(trees) * 1000:.1f}",
+                f"{percentile(trees, 0.95) * 1000:.1f}",
+                f"{statistics.median(slow) * 1000:.1f}"
+            ])
+    print(f"{CLIENTS} concurrent clients for {DURATION:.0f}s each; every {SLOW_EVERY}th request waits "
+          f"{SLOW_QUERY_SECONDS * 1000:.0f} ms in the database")
+    print_table(["session", "req/s", "tree p50 ms", "tree p95 ms", "slow p50 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
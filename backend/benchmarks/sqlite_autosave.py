@@ -0,0 +1,154 @@
+"""Concurrent autosaves against SQLite, with and without the connection pragmas.
+
+16 editors each PATCH their own deck as fast as the server answers, while
+8 viewers keep loading trees. Every configuration runs in a fresh process
+and database, since settings are read at import:
+
+- sqlite defaults: rollback journal, synchronous=FULL, no busy timeout
+- rollback + 5s timeout: the engine as it was before the pragmas, relying
+  on pysqlite's default 5 second busy handler
+- WAL (settings): the pragmas the app applies now
+
+Failed requests are counted by status, and the driver errors behind them
+are counted server-side; "database is locked" surfaces as a 500 or a
+dropped connection.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+CONFIGS = [
+    ("sqlite defaults", {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT": "0"}),
+    ("rollback + 5s timeout", {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT": "5000"}),
+    ("WAL (settings)", {}),
+]
+EDITORS = 16
+VIEWERS = 8
+DURATION = 5.0
+
+
+async def run_load(base_url: str, decks) -> dict:
+    """decks: (presentation id, version, id of a block to edit) per editor"""
+    import httpx
+
+    saves, reads, failures = [], 0, Counter()
+    deadline = time.perf_counter() + DURATION
+
+    async def editor(client, presentation_id: int, version: int, block_id: int) -> None:
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            start = time.perf_counter()
+            try:
+                response = await client.patch(f"/api/presentations/{presentation_id}", json={
+                    "version": version,
+                    "operations": [{"op": "update_block", "block_id": block_id, "data": {"content": f"Draft {n}"}}]
+                })
+            except httpx.TransportError as e:
+                failures[f"PATCH dropped ({type(e).__name__})"] += 1
+                continue
+            if response.status_code == 200:
+                version = response.json()["version"]
+                saves.append(time.perf_counter() - start)
+            else:
+                failures[f"PATCH {response.status_code} {response.text[:60]}"] += 1
+                if response.status_code == 409:
+                    version = response.json()["detail"]["version"]
+
+    async def viewer(client, presentation_id: int) -> None:
+        nonlocal reads
+        while time.perf_counter() < deadline:
+            try:
+                response = await client.get(f"/api/presentations/{presentation_id}")
+            except httpx.TransportError as e:
+                failures[f"GET dropped ({type(e).__name__})"] += 1
+                continue
+            if response.status_code == 200:
+                reads += 1
+            else:
+                failures[f"GET {response.status_code}"] += 1
+
+    limits = httpx.Limits(max_connections=EDITORS + VIEWERS)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(
+            *(editor(client, *deck) for deck in decks),
+            *(viewer(client, decks[i % len(decks)][0]) for i in range(VIEWERS))
+        )
+    saves.sort()
+    return {
+        "saves": len(saves),
+        "p50": saves[len(saves) // 2] if saves else None,
+        "p95": saves[int(len(saves) * 0.95)] if saves else None,
+        "reads": reads,
+        "failures": dict(failures)
+    }
+
+
+def run_config() -> None:
+    """One configuration, in this process; prints its results as JSON"""
+    from benchmarks.common import load_app, serve
+    from sqlalchemy import event
+    from app.database import SessionLocal, async_engine, engine, pool_report
+    from app.services.presentation_service import PresentationService
+
+    app = load_app()
+    database_errors = Counter()
+
+    def count_error(context) -> None:
+        database_errors[str(context.original_exception)] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "handle_error", count_error)
+    db = SessionLocal()
+    try:
+        decks = []
+        for i in range(EDITORS):
+            presentation = PresentationService.create_presentation(db, {
+                "title": f"Deck {i}",
+                "slides": [{"title": f"Slide {n}", "content_blocks": [{"type": "text", "content": "Draft"}]}
+                           for n in range(20)]
+            })
+            decks.append((presentation.id, presentation.version, presentation.slides[0].content_blocks[0].id))
+    finally:
+        db.close()
+    with serve(app) as base_url:
+        result = asyncio.run(run_load(base_url, decks))
+    result["database_errors"] = dict(database_errors)
+    result["pool"] = pool_report(engine)
+    print(json.dumps(result))
+
+
+def main() -> None:
+    from benchmarks.common import BACKEND_DIR, print_table
+
+    rows = []
+    for name, env in CONFIGS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_autosave", "--run"],
+            cwd=BACKEND_DIR, env={**os.environ, **env}, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        failed = sum(result["failures"].values())
+        rows.append([
+            name, result["saves"], failed,
+            f"{result['p50'] * 1000:.0f}" if result["p50"] else "-",
+            f"{result['p95'] * 1000:.0f}" if result["p95"] else "-",
+            result["reads"]
+        ])
+        for error, count in result["failures"].items():
+            print(f"{name}: {count} x {error}")
+        for error, count in result["database_errors"].items():
+            print(f"{name}: {count} x driver error {error!r}")
+    print(f"{EDITORS} editors autosaving and {VIEWERS} viewers for {DURATION:.0f}s")
+    print_table(["config", "saves", "failed", "save p50 ms", "save p95 ms", "reads"], rows)
+
+
+if __name__ == "__main__":
+    if "--run" in sys.argv:
+        run_config()
+    else:
+        main()
@@ -0,0 +1,115 @@
+"""Encode time and bytes on the wire for a 500-slide presentation tree.
+
+Compares the encodings GET /api/presentations/{id} can send: the
+jsonable_encoder + json.dumps path FastAPI takes by default, the orjson
+body the tree cache stores, MessagePack, and the orjson body compressed
+with gzip and brotli at the CompressionMiddleware settings. MessagePack is
+sent uncompressed, as the middleware skips application/msgpack.
+"""
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.common import load_app, print_table
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.presentation_service import PresentationService
+from app.services.tree_cache import PresentationTreeCache, encode_msgpack, msgpack
+from app.utils.compression import CompressionMiddleware, brotli
+
+SLIDES = 500
+REPEATS = 20
+
+# Text drawn from a varied vocabulary, so it compresses like prose rather
+# than like one sentence repeated 500 times
+WORDS = [f"{stem}{suffix}" for stem in (
+    "water", "cloud", "rain", "ocean", "river", "vapour", "heat", "sun", "cool", "air", "ice", "snow",
+    "lake", "soil", "plant", "root", "leaf", "flow", "storm", "wind", "mountain", "valley", "sea", "drop"
+) for suffix in ("", "s", "ed", "ing", "y", "er")]
+
+
+def sentence(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def deck() -> dict:
+    rng = random.Random(3)
+    return {
+        "title": f"{SLIDES}-slide deck",
+        "description": "Benchmark",
+        "slides": [
+            {
+                "title": f"Slide {n}: {sentence(rng, 4)}",
+                "notes": sentence(rng, 25),
+                "content_blocks": [
+                    {"type": "text", "content": sentence(rng, 8),
+                     "position_x": 40, "position_y": 40, "width": 880, "height": 80,
+                     "styles": {"fontSize": 32, "fontWeight": "bold", "color": "#1f2937"}},
+                    {"type": "text", "content": " ".join(sentence(rng, 12) for _ in range(4)),
+                     "position_x": 40, "position_y": 160, "width": 880, "height": 240,
+                     "styles": {"fontSize": 20, "color": "#374151"}},
+                    {"type": "image", "content": f"/uploads/diagram-{n % 20}.png",
+                     "position_x": 560, "position_y": 200, "width": 360, "height": 270,
+                     "metadata": {"alt": sentence(rng, 6)}},
+                ]
+            }
+            for n in range(SLIDES)
+        ]
+    }
+
+
+def median_ms(run) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def main() -> None:
+    load_app()
+    db = SessionLocal()
+    try:
+        presentation_id = PresentationService.create_presentation(db, deck()).id
+        data = PresentationService.get_presentation_tree(db, presentation_id).data
+    finally:
+        db.close()
+
+    compression = CompressionMiddleware(
+        None, gzip_level=settings.compression_gzip_level, brotli_quality=settings.compression_brotli_quality
+    )
+    body = PresentationTreeCache.encode(data)
+    encoders = [
+        ("jsonable_encoder + json", lambda: json.dumps(jsonable_encoder(data)).encode()),
+        ("orjson", lambda: PresentationTreeCache.encode(data)),
+        (f"orjson + gzip {settings.compression_gzip_level}",
+         lambda: compression.compress("gzip", PresentationTreeCache.encode(data))),
+    ]
+    if brotli is not None:
+        encoders.append((f"orjson + brotli {settings.compression_brotli_quality}",
+                         lambda: compression.compress("br", PresentationTreeCache.encode(data))))
+    if msgpack is not None:
+        encoders.append(("msgpack", lambda: encode_msgpack(data)))
+
+    rows = []
+    for name, encode in encoders:
+        size = len(encode())
+        rows.append([name, f"{median_ms(encode):.1f}", f"{size:,}", f"{size / len(body):.0%}"])
+    # On a tree cache hit the orjson body is already encoded; only
+    # compression is left
+    rows.append([f"cached body + gzip {settings.compression_gzip_level}",
+                 f"{median_ms(lambda: compression.compress('gzip', body)):.1f}", "", ""])
+    if brotli is not None:
+        rows.append([f"cached body + brotli {settings.compression_brotli_quality}",
+                     f"{median_ms(lambda: compression.compress('br', body)):.1f}", "", ""])
+
+    print(f"{SLIDES} slides, {SLIDES * 3} blocks; median of {REPEATS}")
+    print_table(["encoding", "encode ms", "bytes", "vs orjson"], rows)
+
+
+if __name__ == "__main__":
+    main()
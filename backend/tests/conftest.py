@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database and storage before it is imported;
+# settings are read once at import time.
+_workdir = tempfile.mkdtemp(prefix="edupresent-tests-")
+os.chdir(_workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.services import ai_service
+from app.services.ai_client import AIClient
+from .stub_model_api import StubModelAPI
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent through either engine while the test runs"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", record)
+    yield sent
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="session")
+def model_api():
+    stub = StubModelAPI()
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def app_model_api(model_api, monkeypatch):
+    """The stub model API, wired in as the app's AI client"""
+    monkeypatch.setattr(ai_service, "ai_client", AIClient(
+        base_url=model_api.base_url, api_key="test", max_concurrency=4, max_connections=4,
+        max_retries=2, retry_base_delay=0.01, retry_max_delay=0.05, timeout=5.0
+    ))
+    return model_api
+
+
+@pytest.fixture(autouse=True)
+def _reset_model_api(request):
+    yield
+    if "model_api" in request.fixturenames:
+        request.getfixturevalue("model_api").reset()
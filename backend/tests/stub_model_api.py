@@ -0,0 +1,89 @@
+"""A local stand-in for the chat completions API, served over real HTTP.
+
+Tests queue the replies it should give with reply(), fail() and stream();
+requests beyond the queue get the last reply again.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+class StreamDropped(Exception):
+    """Raised inside the stub's stream to cut the connection mid-response"""
+
+
+class StubModelAPI:
+    def __init__(self):
+        self.requests: List[Dict] = []
+        self._replies: List[Dict] = []
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.port = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reply(self, content: str, delay: float = 0.0) -> "StubModelAPI":
+        self._replies.append({"kind": "reply", "content": content, "delay": delay})
+        return self
+
+    def fail(self, status_code: int = 503, retry_after: Optional[str] = "0") -> "StubModelAPI":
+        self._replies.append({"kind": "fail", "status_code": status_code, "retry_after": retry_after})
+        return self
+
+    def stream(self, deltas: List[str], drop_after: Optional[int] = None) -> "StubModelAPI":
+        """Send deltas as SSE events, cutting the connection after drop_after of them"""
+        self._replies.append({"kind": "stream", "deltas": deltas, "drop_after": drop_after})
+        return self
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self._replies.clear()
+
+    async def _completions(self, request: Request) -> Response:
+        self.requests.append(await request.json())
+        if not self._replies:
+            return JSONResponse({"error": "no reply queued"}, status_code=500)
+        spec = self._replies.pop(0) if len(self._replies) > 1 else self._replies[0]
+
+        if spec["kind"] == "fail":
+            headers = {"Retry-After": spec["retry_after"]} if spec["retry_after"] else {}
+            return JSONResponse({"error": "unavailable"}, status_code=spec["status_code"], headers=headers)
+        if spec["kind"] == "reply":
+            await asyncio.sleep(spec["delay"])
+            return JSONResponse({"choices": [{"message": {"content": spec["content"]}}]})
+
+        async def events():
+            for i, delta in enumerate(spec["deltas"]):
+                if spec["drop_after"] is not None and i >= spec["drop_after"]:
+                    raise StreamDropped()
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}\n\n"
+                await asyncio.sleep(0.01)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    def start(self) -> None:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        app = Starlette(routes=[Route("/chat/completions", self._completions, methods=["POST"])])
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="critical"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
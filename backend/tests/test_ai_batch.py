@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+def create_presentation(client, text: str) -> int:
+    response = client.post("/api/presentations/", json={
+        "title": "Batch",
+        "slides": [{"title": "One", "content_blocks": [{"type": "text", "content": text}]}]
+    })
+    return response.json()["id"]
+
+
+def enhance(client, presentation_id: int):
+    return client.post("/api/ai/enhance-content/batch", json={
+        "presentation_id": presentation_id, "persist": True, "use_cache": False
+    })
+
+
+def test_persist_writes_back_and_bumps_version(client, app_model_api):
+    app_model_api.reply("Improved text")
+    presentation_id = create_presentation(client, "Plain text")
+
+    response = enhance(client, presentation_id)
+
+    assert response.status_code == 200
+    assert response.json()["versions"] == {str(presentation_id): 2}
+    tree = client.get(f"/api/presentations/{presentation_id}").json()
+    assert tree["version"] == 2
+    assert tree["slides"][0]["content_blocks"][0]["content"] == "Improved text"
+
+
+def test_persist_conflicts_with_edit_made_during_model_call(client, app_model_api):
+    app_model_api.reply("Improved text", delay=0.5)
+    presentation_id = create_presentation(client, "Plain text")
+    block_id = client.get(f"/api/presentations/{presentation_id}").json()["slides"][0]["content_blocks"][0]["id"]
+
+    responses = []
+    worker = threading.Thread(target=lambda: responses.append(enhance(client, presentation_id)))
+    worker.start()
+    time.sleep(0.2)
+    patched = client.patch(f"/api/presentations/{presentation_id}", json={
+        "version": 1,
+        "operations": [{"op": "update_block", "block_id": block_id, "data": {"content": "Edited by hand"}}]
+    })
+    worker.join()
+
+    assert patched.status_code == 200
+    assert responses[0].status_code == 409
+    assert responses[0].json()["detail"]["version"] == 2
+    tree = client.get(f"/api/presentations/{presentation_id}").json()
+    assert tree["slides"][0]["content_blocks"][0]["content"] == "Edited by hand"
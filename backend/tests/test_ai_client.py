@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services.ai_client import AIClient, AIClientError
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def make_client(model_api, max_retries=2) -> AIClient:
+    return AIClient(
+        base_url=model_api.base_url, api_key="test", max_concurrency=4, max_connections=4,
+        max_retries=max_retries, retry_base_delay=0.01, retry_max_delay=0.05, timeout=5.0
+    )
+
+
+def run(coroutine_function, model_api, **client_options):
+    async def main():
+        client = make_client(model_api, **client_options)
+        try:
+            return await coroutine_function(client)
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+async def collect(stream):
+    return [delta async for delta in stream]
+
+
+def test_chat_retries_retryable_status(model_api):
+    model_api.fail(503).reply("done")
+    assert run(lambda client: client.chat(MESSAGES, "m", 10, 0.0), model_api) == "done"
+    assert len(model_api.requests) == 2
+
+
+def test_chat_gives_up_after_max_retries(model_api):
+    model_api.fail(503)
+    with pytest.raises(AIClientError) as error:
+        run(lambda client: client.chat(MESSAGES, "m", 10, 0.0), model_api, max_retries=1)
+    assert error.value.status_code == 503
+    assert len(model_api.requests) == 2
+
+
+def test_chat_coalesces_identical_requests(model_api):
+    model_api.reply("shared", delay=0.2)
+
+    async def both(client):
+        return await asyncio.gather(
+            client.chat(MESSAGES, "m", 10, 0.0),
+            client.chat(MESSAGES, "m", 10, 0.0)
+        )
+
+    assert run(both, model_api) == ["shared", "shared"]
+    assert len(model_api.requests) == 1
+
+
+def test_cancelled_leader_does_not_fail_followers(model_api):
+    model_api.reply("shared", delay=0.2)
+
+    async def leader_cancelled(client):
+        leader = asyncio.ensure_future(client.chat(MESSAGES, "m", 10, 0.0))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(client.chat(MESSAGES, "m", 10, 0.0))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result
+
+    assert run(leader_cancelled, model_api) == "shared"
+    assert len(model_api.requests) == 1
+
+
+def test_stream_retries_before_output(model_api):
+    model_api.fail(503).stream(["[", "1", "]"])
+    deltas = run(lambda client: collect(client.chat_stream(MESSAGES, "m", 10, 0.0)), model_api)
+    assert "".join(deltas) == "[1]"
+    assert len(model_api.requests) == 2
+
+
+def test_stream_interrupted_after_output_is_not_retried(model_api):
+    model_api.stream(['{"slides": [', '{"a":1}', ',', '{"b":2}]}'], drop_after=2)
+    received = []
+
+    async def consume(client):
+        async for delta in client.chat_stream(MESSAGES, "m", 10, 0.0):
+            received.append(delta)
+
+    with pytest.raises(AIClientError):
+        run(consume, model_api)
+    # The caller saw the start of the output exactly once
+    assert received == ['{"slides": [', '{"a":1}']
+    assert len(model_api.requests) == 1
@@ -0,0 +1,83 @@
+import json
+
+from app.utils.json_stream import JSONArrayStreamParser
+
+PRESENTATION = {
+    "title": "Photosynthesis",
+    "description": "How plants make food",
+    "slides": [
+        {"title": "Light", "content": "Chlorophyll absorbs {light}", "layout": "title-content"},
+        {"title": "Water", "content": "Roots take up \"water\"", "layout": "two-column"},
+        {"title": "Sugar", "content": "Glucose is made", "layout": "image-text"}
+    ]
+}
+
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def sse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def generate(client, prompt: str):
+    response = client.post(
+        "/api/ai/generate-presentation/stream",
+        json={"prompt": prompt, "num_slides": 3, "theme": "dark"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return sse_events(response.text)
+
+
+def test_parser_yields_each_slide_once_whatever_the_chunking():
+    text = json.dumps(PRESENTATION)
+    for size in (1, 3, 7, len(text)):
+        parser = JSONArrayStreamParser("slides")
+        slides = [slide for chunk in chunked(text, size) for slide in parser.feed(chunk)]
+        assert slides == PRESENTATION["slides"]
+        assert parser.result() == PRESENTATION
+
+
+def test_stream_sends_slides_then_done(client, app_model_api):
+    app_model_api.stream(chunked(json.dumps(PRESENTATION), 5))
+
+    events = generate(client, "photosynthesis streamed")
+
+    assert [event for event, _ in events] == ["slide", "slide", "slide", "done"]
+    assert [data["index"] for _, data in events[:3]] == [0, 1, 2]
+    assert [data["slide"] for _, data in events[:3]] == PRESENTATION["slides"]
+    assert events[-1][1] == dict(PRESENTATION, theme="dark")
+
+
+def test_repeated_prompt_is_served_from_cache(client, app_model_api):
+    app_model_api.stream(chunked(json.dumps(PRESENTATION), 5))
+
+    first = generate(client, "photosynthesis cached")
+    second = generate(client, "  Photosynthesis   CACHED ")
+
+    assert second == first
+    assert len(app_model_api.requests) == 1
+
+
+def test_stream_cut_off_mid_response_reports_error_and_caches_nothing(client, app_model_api):
+    deltas = chunked(json.dumps(PRESENTATION), 5)
+    app_model_api.stream(deltas, drop_after=len(deltas) // 2)
+
+    events = generate(client, "photosynthesis interrupted")
+
+    assert events[-1][0] == "error"
+    slides = [data["slide"] for event, data in events if event == "slide"]
+    # Whatever arrived before the cut is a clean prefix, never repeated
+    assert slides == PRESENTATION["slides"][:len(slides)]
+    assert len(app_model_api.requests) == 1
+
+    app_model_api.reset()
+    app_model_api.stream(chunked(json.dumps(PRESENTATION), 5))
+    assert generate(client, "photosynthesis interrupted")[-1][0] == "done"
+    assert len(app_model_api.requests) == 1
@@ -0,0 +1,51 @@
+import asyncio
+import io
+import json
+import zipfile
+
+from app.services.export_service import ExportService
+
+
+def test_small_export_renders_off_the_event_loop(client, monkeypatch):
+    presentation_id = client.post("/api/presentations/", json={
+        "title": "Inline export", "slides": [{"title": "Only"}]
+    }).json()["id"]
+    render = ExportService.render
+    loops = []
+
+    def spy(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return render(*args, **kwargs)
+
+    monkeypatch.setattr(ExportService, "render", spy)
+
+    response = client.post(f"/api/export/pdf/{presentation_id}")
+
+    assert response.status_code == 200
+    assert loops == [None]
+
+
+def test_bulk_export_reports_missing_ids(client):
+    presentation_id = client.post("/api/presentations/", json={
+        "title": "Bulk", "slides": [{"title": "Only"}]
+    }).json()["id"]
+    missing_id = presentation_id + 100000
+
+    response = client.post("/api/export/bulk", json={
+        "format": "pdf", "presentation_ids": [presentation_id, missing_id]
+    })
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+    entries = {entry["presentation_id"]: entry for entry in manifest["presentations"]}
+    assert entries[presentation_id]["status"] == "completed"
+    assert entries[missing_id] == {"presentation_id": missing_id, "status": "failed", "error": "not found"}
+
+    export = client.get(f"/api/export/bulk/{response.headers['X-Export-Id']}").json()
+    assert export["total"] == 2
+    assert export["completed"] == 1
+    assert export["failures"] == [{"presentation_id": missing_id, "error": "not found"}]
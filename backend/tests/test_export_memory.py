@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Renders a synthetic photo deck through ExportCache.put in a fresh
+# interpreter, so ru_maxrss covers nothing but this export.
+EXPORT_SCRIPT = """
+import json, os, resource, sys
+from app.services.export_cache import ExportCache
+from app.services.export_service import ExportService
+
+export_format, slide_count = sys.argv[1], int(sys.argv[2])
+presentation = {"title": "Photos", "description": "", "slides": [
+    {"title": f"Slide {i}", "content_blocks": [
+        {"type": "text", "content": "Caption"},
+        {"type": "image", "content": f"/uploads/photo{i}.jpg"}
+    ]}
+    for i in range(slide_count)
+]}
+cache = ExportCache("cache/exports", 10 ** 10)
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+path = cache.put(f"deck{slide_count}", export_format,
+                 lambda output: ExportService.render(presentation, export_format, output))
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"growth": (after - before) * 1024, "size": os.path.getsize(path)}))
+"""
+
+
+@pytest.fixture(scope="module")
+def photo_dir(tmp_path_factory):
+    """40 distinct camera-sized JPEGs that don't compress, in uploads/"""
+    workdir = tmp_path_factory.mktemp("export-memory")
+    uploads = workdir / "uploads"
+    uploads.mkdir()
+    for i in range(40):
+        Image.frombytes("RGB", (1200, 900), os.urandom(1200 * 900 * 3)).save(uploads / f"photo{i}.jpg", quality=90)
+    return workdir
+
+
+def measure_export(workdir, export_format: str, slide_count: int) -> dict:
+    # Each run starts with an empty downsampled image cache
+    shutil.rmtree(workdir / "cache", ignore_errors=True)
+    result = subprocess.run(
+        [sys.executable, "-c", EXPORT_SCRIPT, export_format, str(slide_count)],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ru_maxrss is in KiB on Linux only")
+@pytest.mark.parametrize("export_format", ["pdf", "pptx"])
+def test_export_peak_rss_grows_with_output_not_source_images(photo_dir, export_format):
+    small = measure_export(photo_dir, export_format, 10)
+    large = measure_export(photo_dir, export_format, 40)
+
+    # reportlab and python-pptx keep the whole document in memory until it is
+    # written out, so peak RSS does grow with the output: about 3x the added
+    # bytes for PDF and 1x for PPTX. Output goes to disk without an extra
+    # in-memory copy, and sources are downsampled one at a time; holding the
+    # decoded photos instead would cost ~20x.
+    added_rss = large["growth"] - small["growth"]
+    added_output = large["size"] - small["size"]
+    assert added_rss <= 5 * added_output, (small, large)
+    assert large["growth"] <= 64 * 1024 * 1024, large
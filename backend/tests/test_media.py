@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.services.media_service import BlobContentionError, MediaService
+
+BOUNDARY = b"upload-boundary"
+FILE_PART = (
+    b"--" + BOUNDARY + b"\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="big.png"\r\n'
+    b"Content-Type: image/png\r\n\r\n"
+)
+CHUNK = 64 * 1024
+
+
+def post_upload(headers, chunks):
+    """POST the chunks to /api/media/upload over raw ASGI.
+
+    Returns (status, number of chunks the app read).
+    """
+    chunks = list(chunks)
+    total = len(chunks)
+    sent = []
+
+    async def receive():
+        if chunks:
+            body = chunks.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/media/upload", "raw_path": b"/api/media/upload",
+        "root_path": "", "query_string": b"", "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY), *headers],
+    }
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], total - len(chunks)
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size", 4 * CHUNK)
+
+
+def test_upload_declared_too_large_is_rejected_unread(small_limit):
+    chunks = [FILE_PART] + [b"x" * CHUNK] * 20
+    length = str(sum(len(chunk) for chunk in chunks)).encode()
+
+    status, read = post_upload([(b"content-length", length)], chunks)
+
+    assert status == 413
+    assert read == 0
+
+
+def test_upload_without_length_stops_at_the_limit(small_limit):
+    chunks = [FILE_PART] + [b"x" * CHUNK] * 20
+
+    status, read = post_upload([(b"transfer-encoding", b"chunked")], chunks)
+
+    assert status == 413
+    # The limit plus the form overhead is 5 chunks' worth
+    assert read <= 7
+
+
+def test_upload_within_the_limit_is_stored(client, small_limit):
+    content = b"\x89PNG\r\n\x1a\n" + b"x" * (2 * CHUNK)
+
+    response = client.post("/api/media/upload", files={"file": ("small.png", content, "image/png")})
+
+    assert response.status_code == 200
+    assert response.json()["file_size"] == len(content)
+
+
+def test_client_hash_upload_survives_a_racing_delete(client, monkeypatch):
+    content = b"\x89PNG\r\n\x1a\n" + b"raced content"
+    sha256 = hashlib.sha256(content).hexdigest()
+    first = client.post("/api/media/upload", files={"file": ("first.png", content, "image/png")}).json()
+    acquire = MediaService._acquire_blob
+    raced = []
+
+    def delete_first_then_acquire(db, *args):
+        # The only other reference is deleted while this upload claims it
+        if not raced:
+            raced.append(True)
+            other = SessionLocal()
+            try:
+                MediaService.delete_media(other, MediaService.get_media(other, first["id"]))
+            finally:
+                other.close()
+            db.rollback()
+            raise BlobContentionError(sha256)
+        return acquire(db, *args)
+
+    monkeypatch.setattr(MediaService, "_acquire_blob", delete_first_then_acquire)
+
+    response = client.post(
+        "/api/media/upload", files={"file": ("second.png", content, "image/png")}, data={"sha256": sha256}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["deduplicated"] is False
+    assert client.get(response.json()["file_path"]).content == content
@@ -0,0 +1,194 @@
+import base64
+import json
+
+import pytest
+
+from app.services.presentation_service import REBALANCE_GAP
+
+
+def create_deck(client, slide_count: int) -> int:
+    response = client.post("/api/presentations/", json={
+        "title": f"{slide_count} slides",
+        "slides": [
+            {"title": f"Slide {n}", "content_blocks": [
+                {"type": "text", "content": "Heading"},
+                {"type": "text", "content": "Body"}
+            ]}
+            for n in range(slide_count)
+        ]
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_tree_load_query_count_does_not_grow_with_slides(client, statements):
+    counts = {}
+    for slide_count in (2, 50):
+        presentation_id = create_deck(client, slide_count)
+        statements.clear()
+
+        # The deck was just created, so this is a tree cache miss
+        response = client.get(f"/api/presentations/{presentation_id}")
+
+        assert response.status_code == 200
+        assert len(response.json()["slides"]) == slide_count
+        counts[slide_count] = len(statements)
+
+    assert counts[50] == counts[2]
+
+
+def test_reorders_renumber_inline(client):
+    presentation_id = client.post("/api/presentations/", json={
+        "title": "Reordered",
+        "slides": [{"title": title} for title in ("A", "B", "C")]
+    }).json()["id"]
+    tree = client.get(f"/api/presentations/{presentation_id}").json()
+    first, second, third = (slide["id"] for slide in tree["slides"])
+    version = tree["version"]
+
+    # Keep moving a slide in right after the first one, halving the gap each
+    # time, well past the point where the keys have to be respaced
+    for moving in [third, second] * 10:
+        response = client.patch(f"/api/presentations/{presentation_id}", json={
+            "version": version,
+            "operations": [{"op": "move_slide", "slide_id": moving, "data": {"after_slide_id": first}}]
+        })
+        assert response.status_code == 200
+        assert response.json()["version"] == version + 1
+        version = response.json()["version"]
+
+        # Nothing bumps the version after the PATCH returns, so its ETag
+        # stays current
+        fresh = client.get(f"/api/presentations/{presentation_id}", headers={
+            "If-None-Match": response.headers["ETag"], "Accept-Encoding": "identity"
+        })
+        assert fresh.status_code == 304
+        tree = client.get(f"/api/presentations/{presentation_id}").json()
+        keys = [slide["order_index"] for slide in tree["slides"]]
+        assert all(b - a >= REBALANCE_GAP for a, b in zip(keys, keys[1:]))
+
+    assert [slide["id"] for slide in tree["slides"]] == [first, second, third]
+
+
+def test_move_block_to_another_slide_goes_on_top(client):
+    presentation_id = client.post("/api/presentations/", json={
+        "title": "Blocks",
+        "slides": [
+            {"title": "From", "content_blocks": [{"type": "text", "content": "Moving"}]},
+            {"title": "To", "content_blocks": [{"type": "text", "content": "One"}, {"type": "text", "content": "Two"}]}
+        ]
+    }).json()["id"]
+    tree = client.get(f"/api/presentations/{presentation_id}").json()
+    source, target = tree["slides"]
+    block_id = source["content_blocks"][0]["id"]
+
+    response = client.patch(f"/api/presentations/{presentation_id}", json={
+        "version": tree["version"],
+        "operations": [{"op": "move_block", "block_id": block_id, "slide_id": target["id"]}]
+    })
+
+    assert response.status_code == 200
+    blocks = client.get(f"/api/presentations/{presentation_id}").json()["slides"][1]["content_blocks"]
+    assert [block["content"] for block in blocks] == ["One", "Two", "Moving"]
+    assert blocks[2]["z_index"] > blocks[1]["z_index"]
+
+
+def test_recreated_id_does_not_match_deleted_deck(client):
+    old_id = client.post("/api/presentations/", json={"title": "Old deck"}).json()["id"]
+    old = client.get(f"/api/presentations/{old_id}")
+    assert client.delete(f"/api/presentations/{old_id}").status_code == 200
+
+    # The SQLite fallback hands the newest row's id out again
+    new_id = client.post("/api/presentations/", json={"title": "Brand new deck"}).json()["id"]
+    response = client.get(f"/api/presentations/{new_id}", headers={"If-None-Match": old.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != old.headers["ETag"]
+    assert response.json()["title"] == "Brand new deck"
+    assert client.get(f"/api/presentations/{new_id}").json()["title"] == "Brand new deck"
+
+
+def test_if_match_for_deleted_deck_does_not_apply_to_recreated_id(client):
+    old_id = client.post("/api/presentations/", json={"title": "Old deck", "slides": [{"title": "Old"}]}).json()["id"]
+    stale_etag = client.get(f"/api/presentations/{old_id}").headers["ETag"]
+    client.delete(f"/api/presentations/{old_id}")
+    new_id = client.post("/api/presentations/", json={"title": "Brand new deck", "slides": [{"title": "New"}]}).json()["id"]
+
+    response = client.patch(f"/api/presentations/{new_id}", headers={"If-Match": stale_etag}, json={
+        "operations": [{"op": "add_slide", "data": {"title": "From a stale tab"}}]
+    })
+
+    assert response.status_code == 409
+    slides = client.get(f"/api/presentations/{new_id}").json()["slides"]
+    assert [slide["title"] for slide in slides] == ["New"]
+
+
+def test_patch_rejects_mistyped_operation_data(client):
+    presentation_id = create_deck(client, 2)
+    tree = client.get(f"/api/presentations/{presentation_id}").json()
+    slide_id = tree["slides"][0]["id"]
+    block_id = tree["slides"][0]["content_blocks"][0]["id"]
+
+    for operation in [
+        {"op": "move_slide", "slide_id": slide_id, "data": {"order_index": "a"}},
+        {"op": "move_slide", "slide_id": slide_id, "data": {"after_slide_id": "first"}},
+        {"op": "update_block", "block_id": block_id, "data": {"position_x": "left"}},
+        {"op": "move_block", "block_id": block_id, "data": {"z_index": [1]}},
+        {"op": "add_slide", "data": {"content_blocks": [{"content": "no type"}]}},
+    ]:
+        response = client.patch(f"/api/presentations/{presentation_id}", json={
+            "version": tree["version"], "operations": [operation]
+        })
+        assert response.status_code == 422, operation
+
+    assert client.get(f"/api/presentations/{presentation_id}").json()["version"] == tree["version"]
+
+
+def test_each_representation_and_encoding_has_its_own_etag(client):
+    presentation_id = create_deck(client, 20)
+    url = f"/api/presentations/{presentation_id}"
+    variants = {
+        "json": {"Accept-Encoding": "identity"},
+        "msgpack": {"Accept": "application/msgpack", "Accept-Encoding": "identity"},
+        "gzip": {"Accept-Encoding": "gzip"},
+        "br": {"Accept-Encoding": "br"},
+    }
+    etags = {}
+    for name, headers in variants.items():
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        etags[name] = response.headers["ETag"]
+    assert len(set(etags.values())) == len(etags)
+
+    # Each tag revalidates its own variant, and not the other representation
+    # or coding
+    others = {"json": "msgpack", "msgpack": "json", "gzip": "br", "br": "gzip"}
+    for name, headers in variants.items():
+        response = client.get(url, headers={**headers, "If-None-Match": etags[name]})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etags[name]
+        response = client.get(url, headers={**headers, "If-None-Match": etags[others[name]]})
+        assert response.status_code == 200
+
+    # Any of them names the version for If-Match
+    tree = client.get(url).json()
+    response = client.patch(url, headers={"If-Match": etags["gzip"]}, json={
+        "operations": [{"op": "update_slide", "slide_id": tree["slides"][0]["id"], "data": {"title": "Renamed"}}]
+    })
+    assert response.status_code == 200
+    assert response.json()["version"] == tree["version"] + 1
+
+
+@pytest.mark.parametrize("url", ["/api/presentations/", "/api/presentations/templates",
+                                 "/api/presentations/search?q=deck", "/api/media/"])
+@pytest.mark.parametrize("values", [
+    ["2024-01-01"], ["2024-01-01", 1, 2], [{"a": 1}, 1], [["a"], 1], ["2024-01-01", "1"],
+    ["2024-01-01", True], ["2024-01-01", 1.5], {"value": "2024-01-01", "id": 1}
+])
+def test_tampered_cursor_is_rejected(client, url, values):
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+    separator = "&" if "?" in url else "?"
+
+    response = client.get(f"{url}{separator}cursor={cursor}")
+
+    assert response.status_code == 400
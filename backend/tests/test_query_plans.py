@@ -0,0 +1,121 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, select
+
+from app.database import engine
+from app.models.content_block import ContentBlock
+from app.models.media import Media
+from app.models.presentation import Presentation
+from app.models.slide import Slide
+from app.services.media_service import MediaService
+from app.services.presentation_service import PresentationService
+
+# "SEARCH ..." seeks into an index. "SCAN ..." reads a whole table or index,
+# which is only fine when walking a keyset index in order up to a LIMIT.
+SCAN = re.compile(r"^SCAN (?:TABLE )?\w+(?: USING (?:COVERING )?INDEX (\w+))?")
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """A few hundred presentations with slides and blocks, and a page of media"""
+    now = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        first_id = (conn.scalar(select(Presentation.id).order_by(Presentation.id.desc()).limit(1)) or 0) + 1
+        conn.execute(insert(Presentation), [
+            {"title": f"Deck {i}", "created_at": now + timedelta(minutes=i),
+             "updated_at": now + timedelta(minutes=i), "is_template": i % 10 == 0}
+            for i in range(300)
+        ])
+        presentation_ids = conn.scalars(select(Presentation.id).where(Presentation.id >= first_id)).all()
+        conn.execute(insert(Slide), [
+            {"presentation_id": presentation_id, "title": f"Slide {n}", "order_index": (n + 1) * 1024}
+            for presentation_id in presentation_ids for n in range(5)
+        ])
+        slide_ids = conn.scalars(
+            select(Slide.id).where(Slide.presentation_id.in_(presentation_ids))
+        ).all()
+        conn.execute(insert(ContentBlock), [
+            {"slide_id": slide_id, "type": "text", "content": f"Block {n}", "z_index": (n + 1) * 1024}
+            for slide_id in slide_ids for n in range(3)
+        ])
+        conn.execute(insert(Media), [
+            {"filename": f"{i}.png", "original_filename": f"{i}.png", "file_path": f"uploads/{i}.png",
+             "file_size": 1, "mime_type": "image/png", "uploaded_at": now + timedelta(minutes=i)}
+            for i in range(300)
+        ])
+    return presentation_ids
+
+
+def explain(statements):
+    with engine.connect() as conn:
+        return [
+            (statement, [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)])
+            for statement, parameters in statements
+        ]
+
+
+def record_selects(run):
+    """Run the callable and return (statement, plan lines) for each SELECT it sent"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            sent.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert sent
+    return explain(sent)
+
+
+def assert_no_full_scans(explained, walking=()):
+    for statement, plan in explained:
+        scans = [
+            line for line in plan
+            for match in [SCAN.match(line)] if match and match.group(1) not in walking
+        ]
+        assert not scans, f"full table scan {scans} in:\n{statement}\nplan: {plan}"
+
+
+def assert_no_sort(explained):
+    for statement, plan in explained:
+        sorts = [line for line in plan if "TEMP B-TREE" in line]
+        assert not sorts, f"sort {sorts} in:\n{statement}\nplan: {plan}"
+
+
+def test_tree_load_seeks_slides_and_blocks(db, seeded):
+    explained = record_selects(lambda: PresentationService.get_presentation_with_slides(db, seeded[150]))
+    assert_no_full_scans(explained)
+
+
+@pytest.mark.parametrize("sort", ["updated_at", "created_at"])
+@pytest.mark.parametrize("is_template", [None, True])
+def test_presentation_listing_walks_the_keyset_index(db, seeded, sort, is_template):
+    def run():
+        _, cursor = PresentationService.list_presentations(db, limit=20, sort=sort, is_template=is_template)
+        PresentationService.list_presentations(db, limit=20, cursor=cursor, sort=sort, is_template=is_template)
+
+    explained = record_selects(run)
+    assert_no_full_scans(explained, walking={f"ix_presentations_{sort}_id"})
+    assert_no_sort(explained)
+
+
+def test_media_listing_walks_the_keyset_index(db, seeded):
+    def run():
+        _, cursor = MediaService.list_media(db, limit=20)
+        MediaService.list_media(db, limit=20, cursor=cursor)
+
+    explained = record_selects(run)
+    assert_no_full_scans(explained, walking={"ix_media_uploaded_at_id"})
+    assert_no_sort(explained)
+
+
+def test_text_block_listing_seeks_by_presentation(db, seeded):
+    explained = record_selects(lambda: PresentationService.list_text_blocks(db, seeded[10]))
+    assert_no_full_scans(explained)
+
@@ -0,0 +1,17 @@
+def test_snippets_escape_stored_html(client):
+    client.post("/api/presentations/", json={
+        "title": "Escaping",
+        "slides": [{"title": "One", "content_blocks": [
+            {"type": "text", "content": "<script>alert(1)</script> zanzibarite & more"}
+        ]}]
+    })
+
+    response = client.get("/api/presentations/search", params={"q": "zanzibarite"})
+
+    assert response.status_code == 200
+    snippets = [result["snippet"] for result in response.json()]
+    assert snippets
+    for snippet in snippets:
+        assert "<script>" not in snippet
+        assert "<mark>zanzibarite</mark>" in snippet
+    assert any("&lt;script&gt;" in snippet and "&amp;" in snippet for snippet in snippets)